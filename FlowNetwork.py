@@ -1,9 +1,151 @@
 from Graph import Graph, Vertex
+from array import array
+from collections import deque
+import heapq
 import json
+try:
+    import orjson  # Much faster C JSON encoder, writes bytes directly
+except ImportError:
+    orjson = None
 
 class NegativeCapacityException(Exception):
     pass
 
+# Integer "infinity" sentinel for bottleneck/distance initialization: capacities are ints, so starting the
+# min/compare chains from an int keeps them on the int-int fast path (no float boxing per edge visited)
+INT_INF = 1 << 62
+
+def _bfsLevels_csr(indptr, to, cap, s, level):
+    """
+    Level-graph BFS kernel for Dinic's algorithm over the CSR arrays. Module-level and operating only on
+    flat arrays and ints, so it carries no attribute lookups in the inner loop (and could be handed to a
+    JIT compiler wholesale if one is ever added as a dependency).
+    @param level: preallocated per-vertex level array, already reset to -1 by the caller; filled in place
+        with BFS levels (-1 left where unreachable in the residual graph)
+    """
+    level[s] = 0
+    queue = deque([s])
+    while queue:
+        u = queue.popleft()
+        nextLevel = level[u] + 1
+        for e in range(indptr[u], indptr[u + 1]):
+            v = to[e]
+            if cap[e] > 0 and level[v] < 0:
+                level[v] = nextLevel
+                queue.append(v)
+
+def _blockingFlow_csr(indptr, to, cap, rev, level, it, s, t, inf):
+    """
+    Pushes a blocking flow through the level graph for one Dinic phase: iterative DFS from s that only
+    follows level-increasing residual edges, with a current-arc pointer per vertex (it) so dead arcs are
+    never rescanned within the phase. Dead-end vertices are pruned by resetting their level.
+    @return: total flow pushed during this phase
+    """
+    total = 0
+    path = []  # Edge ids of the current DFS path from s
+    u = s
+    while True:
+        if u == t:
+            # Found an augmenting path within the level graph: push its bottleneck
+            f = inf
+            for e in path:
+                if cap[e] < f:
+                    f = cap[e]
+            for e in path:
+                cap[e] -= f
+                cap[rev[e]] += f
+            total += f
+            # Retreat to the tail of the first saturated edge; its current-arc now fails the cap check
+            cut = 0
+            while cap[path[cut]] > 0:
+                cut += 1
+            u = to[rev[path[cut]]]
+            del path[cut:]
+            continue
+
+        # Advance the current arc past edges that are saturated or don't go down a level
+        e = it[u]
+        end = indptr[u + 1]
+        while e < end and not (cap[e] > 0 and level[to[e]] == level[u] + 1):
+            e += 1
+        it[u] = e
+        if e < end:
+            path.append(e)
+            u = to[e]
+        else:
+            # Dead end: prune u from this phase and retreat (done once the source itself is blocked)
+            level[u] = -1
+            if not path:
+                return total
+            u = to[rev[path.pop()]]
+
+def _bellmanFord_csr(indptr, to, cap, cost, s, inf):
+    """
+    Bellman-Ford kernel over the CSR arrays, relaxing only residual (cap > 0) edges, with an early exit
+    once a pass makes no updates. Same flat-arrays-only shape as _bfsLevels_csr.
+    @return: array('q') of shortest path distances from s (inf where unreachable)
+    """
+    n = len(indptr) - 1
+    d = array('q', [inf]) * n
+    d[s] = 0
+    for _ in range(n - 1):
+        updated = False
+        for u in range(n):
+            du = d[u]
+            if du == inf:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                if cap[e] > 0 and du + cost[e] < d[to[e]]:
+                    d[to[e]] = du + cost[e]
+                    updated = True
+        if not updated:
+            break
+    return d
+
+def _negCycleSPFA_csr(indptr, to, cap, rev, cost):
+    """
+    Finds a negative-cost cycle among the residual (cap > 0) edges using SPFA seeded from every vertex at
+    distance 0 - the virtual super-source trick - so cycles anywhere in the graph are detected in one pass.
+    A vertex enqueued more than V times lies on (or hangs off) a negative cycle; walking the predecessor
+    edges V steps from it is guaranteed to land on the cycle itself. Same flat-arrays-only shape as the
+    other kernels here.
+    @return: list of edge ids forming a negative-cost residual cycle, or None if no such cycle exists
+    """
+    n = len(indptr) - 1
+    d = array('q', [0]) * n
+    predEdge = array('q', [-1]) * n
+    count = array('q', [0]) * n
+    inQueue = array('b', [1]) * n
+    queue = deque(range(n))
+    while queue:
+        u = queue.popleft()
+        inQueue[u] = 0
+        du = d[u]
+        for e in range(indptr[u], indptr[u + 1]):
+            if cap[e] > 0:
+                v = to[e]
+                nd = du + cost[e]
+                if nd < d[v]:
+                    d[v] = nd
+                    predEdge[v] = e
+                    if not inQueue[v]:
+                        count[v] += 1
+                        if count[v] > n:
+                            x = v
+                            for _ in range(n):
+                                x = to[rev[predEdge[x]]]  # tail of x's predecessor edge
+                            cycle = []
+                            y = x
+                            while True:
+                                eCyc = predEdge[y]
+                                cycle.append(eCyc)
+                                y = to[rev[eCyc]]
+                                if y == x:
+                                    return cycle
+                        inQueue[v] = 1
+                        queue.append(v)
+    return None
+
 class FlowNetwork:
     """
     A Flow Network. Consists of a source and sink node: S and T; and 4 auxiliary graphs that aid in calculating
@@ -14,6 +156,9 @@ class FlowNetwork:
     Any "flow" pushed through ah edge cannot exceed the capacity specified in the capacity graph,
     and the maximum possible amount of flow that can exist at any point in the graph is:
     min(sum(all capacities leaving S), sum(all capacities entering T))
+
+    All rep checking (checkRep and the per-path _verifyPath) lives behind asserts/__debug__, so running
+    under python -O strips it entirely from production hot paths.
     """
     def __init__(self, source, sink, vertices=None, capacities=None, cost=None):
         self.source = source  # Source node S
@@ -31,6 +176,12 @@ class FlowNetwork:
         # Mutable, represents the residual graph's edge costs (ie cost func mappings * 1( (u,v) exists in res G ))
         self.costGraph = Graph(vertices, {k: self.cost[k] for k in self.cost})
 
+        # Lazily built dense Vertex -> int id mapping for the SoA/CSR lowering (see _vertexIds)
+        self._vid = None
+        self._verts = None
+        # Cached CSR arrays, valid while the topology/capacities/costs are unchanged (see _toCSR)
+        self._csr = None
+
     @staticmethod
     def createFlowNetwork(source, sink, vertices=None, capacities=None, cost=None, flowGraph=None, residualGraph=None, costGraph=None):
         # Constructor only initializes flow/residual/cost graphs, but they could be different, so update them below
@@ -43,10 +194,16 @@ class FlowNetwork:
     def resetFlowAndResidualGraph(self):
         """For each edge present, reset flow to 0 and the residual to the capacity"""
         # TODO: Reset costGraph as well if we really want this reset feature to be reused outside of constructor
-        for u in self.capacityGraph.edges:
-            for v in self.capacityGraph.edges[u]:
-                self.residualGraph.addEdge(u, v, self.getCapacity(u, v))
-                self.flowGraph.addEdge(u, v, 0)
+        # Bulk-copy the capacity adjacency rather than paying an addEdge call (Vertex checks, vertex set
+        # maintenance, id-map invalidation) per edge
+        capEdges = self.capacityGraph.edges
+        self.residualGraph.edges = {u: dict(nbrs) for u, nbrs in capEdges.items()}
+        self.flowGraph.edges = {u: dict.fromkeys(nbrs, 0) for u, nbrs in capEdges.items()}
+        endpoints = set(capEdges)
+        for nbrs in capEdges.values():
+            endpoints.update(nbrs)
+        self.residualGraph.vertices.update(endpoints)
+        self.flowGraph.vertices.update(endpoints)
 
     def checkRep(self):
         """
@@ -54,37 +211,36 @@ class FlowNetwork:
         Should be called before/after methods that mutate the Network's internals.
         """
         flowMappings = self.flowGraph.getEdges()  # TODO: should I create an iterator through Graph edges?
-        for u in flowMappings:
-            for v in flowMappings[u]:
+        resEdges = self.residualGraph.edges
+        for u, flows in flowMappings.items():
+            # Hoist each row's capacity/residual mappings once instead of re-hashing u per edge
+            assert u in self.capacityGraph
+            capU = self.capacityGraph[u]
+            resU = resEdges.get(u, {})
+            for v, f in flows.items():
                 # If there is flow through an edge, then the flow must be <= the capacity
-                assert u in self.capacityGraph
-                assert v in self.capacityGraph[u]
-                f = self.flowGraph[u][v]
-                cp = self.getCapacity(u, v)
+                assert v in capU
+                cp = capU[v]
                 assert 0 <= f <= cp
 
                 # No edge in residual network if flow == capacity
                 if f == cp:
-                    if u in self.residualGraph:
-                        assert v not in self.residualGraph[u]
-                    assert v in self.residualGraph and u in self.residualGraph[v]
-                    assert f == self.residualGraph[v][u]
+                    assert v not in resU
+                    assert v in self.residualGraph and u in resEdges[v]
+                    assert f == resEdges[v][u]
                 else:  # Otherwise, residual flow must be <= capacity-flow, and must have a reverse edge w >= f(u,v)
-                    assert u in self.residualGraph and v in self.residualGraph[u]
-                    assert self.residualGraph[u][v] <= self.getCapacity(u, v) - self.flowGraph[u][v]
+                    assert u in self.residualGraph and v in resU
+                    assert resU[v] <= cp - f
                     if f == 0:  # If 0 flow, then reverse edge shouldn't be in the residual network
-                        if v in self.residualGraph:
-                            assert u not in self.residualGraph[v]
+                        assert u not in resEdges.get(v, {})
                     else:  # Reverse edge >= f(u,v) since there could be other contributing flows through edge (u,v)
-                        assert v in self.residualGraph and u in self.residualGraph[v]
-                        assert self.residualGraph[v][u] >= self.flowGraph[u][v]
+                        assert v in self.residualGraph and u in resEdges[v]
+                        assert resEdges[v][u] >= f
 
-        for u in self.capacityGraph.edges:
-            for v in self.capacityGraph.edges[u]:
-                # Capacities must be non-negative, and also integral (o/w Ford Fulkerson might not converge properly)
-                cp = self.getCapacity(u, v)
-                assert cp >= 0
-                assert isinstance(cp, int)
+        # Capacities must be non-negative, and also integral (o/w Ford Fulkerson might not converge properly)
+        assert all(isinstance(cp, int) and cp >= 0
+                   for nbrs in self.capacityGraph.edges.values()
+                   for cp in nbrs.values())
 
         # Source and sink nodes must be present
         # Total flow out of source must be equal to total flow into sink
@@ -101,12 +257,30 @@ class FlowNetwork:
         assert sourceSum == sinkSum
 
         # Cost Graph checks: all edge weights w(u,v) must be <= cost[u][v]
-        for u in self.costGraph.edges:
-            for v in self.costGraph.edges[u]:
-                assert u in self.cost and v in self.cost[u]
-                assert self.costGraph.getWeight(u, v) <= self.cost[u][v]
+        for u, nbrs in self.costGraph.edges.items():
+            assert u in self.cost
+            costU = self.cost[u]
+            assert u in self.residualGraph
+            resU = resEdges[u]
+            for v, w in nbrs.items():
+                assert v in costU and w <= costU[v]
                 # All cost graph edges must also belong to the residual network (costGraph == costs of residual edges)
-                assert u in self.residualGraph and v in self.residualGraph[u]
+                assert v in resU
+
+    def _verifyPath(self, augPath: list, additionalFlow: int, costsPresent: bool):
+        """
+        [DEBUG] Checks that an augmenting path/cycle is pushable before pushAugmentingFlow mutates anything:
+        every consecutive pair must be a residual edge with capacity >= the flow being pushed, mirrored in
+        the cost graph when costs are in play. Stripped entirely under python -O.
+        """
+        rg = self.residualGraph.edges
+        cg = self.costGraph.edges
+        for i in range(len(augPath) - 1):
+            u, v = augPath[i], augPath[i + 1]
+            assert u in rg and v in rg[u], "path edge (%r, %r) not in residual graph" % (u, v)
+            assert additionalFlow <= rg[u][v], "pushing %r > residual capacity %r" % (additionalFlow, rg[u][v])
+            if costsPresent:
+                assert u in cg and v in cg[u], "path edge (%r, %r) not in cost graph" % (u, v)
 
     def getCapacity(self, u: Vertex, v: Vertex) -> int:
         return self.capacityGraph.getWeight(u, v)
@@ -124,9 +298,23 @@ class FlowNetwork:
         # if any(self.flowGraph[u][v] != 0 for u in self.flowGraph for v in self.flowGraph[u]):
         #     self.resetFlowAndResidualGraph()
 
-        self.capacityGraph.addEdge(u, v, capacity)
-        self.flowGraph.addEdge(u, v, 0)
-        self.residualGraph.addEdge(u, v, capacity)
+        if not isinstance(u, Vertex):
+            u = Vertex(u)
+        if not isinstance(v, Vertex):
+            v = Vertex(v)
+        capU = self.capacityGraph.edges.get(u)
+        if capU is not None and v in capU:
+            # Parallel edge: merge into the one existing (u, v) record by summing capacities, since the
+            # dict-of-dict rep (and the CSR lowering) keep a single slot pair per directed edge
+            capU[v] += capacity
+            resU = self.residualGraph.edges.setdefault(u, {})
+            resU[v] = resU.get(v, 0) + capacity
+        else:
+            self.capacityGraph.addEdge(u, v, capacity)
+            self.flowGraph.addEdge(u, v, 0)
+            self.residualGraph.addEdge(u, v, capacity)
+            self._vid = self._verts = None  # New edge may introduce vertices -> invalidate the id mapping
+        self._csr = None  # Either branch changes capacities (or costs below) -> invalidate the CSR cache
         if cost is not None:
             self.costGraph.addEdge(u, v, cost)
             if u not in self.cost:
@@ -134,18 +322,20 @@ class FlowNetwork:
             else:
                 self.cost[u][v] = cost
 
-    def getAugmentingPath(self) -> list:
+    def getAugmentingPath(self) -> tuple:
         """
         Gets the shortest-length augmenting path via BFS on the residual network. Uses Edmonds-Karp as the spec
-        since it bounds the number of augmentations to O(VE^2) rather than O(E * |f|) where f is the max flow
-        @return: list of vertices in the shortest-length augmenting path
+        since it bounds the number of augmentations to O(VE^2) rather than O(E * |f|) where f is the max flow.
+        The bottleneck is computed during the BFS itself, so callers don't need a second pass over the path.
+        @return: tuple (path, bottleneck) where path is the list of vertices in the shortest-length augmenting
+            path and bottleneck its minimum residual capacity; (None, None) if no augmenting path exists
         """
-        return self.residualGraph.bfs(self.source, self.sink)
+        return self.residualGraph.bfsWithBottleneck(self.source, self.sink)
 
     def getMinCapAlongResCycle(self, negCycle: list) -> int:
         """Gets the minimum capacity among all residual graph edges using vertices from a given negative cost cycle."""
         assert negCycle is not None
-        amountRedirectedFlow = float('inf')
+        amountRedirectedFlow = INT_INF
         for i in range(len(negCycle) - 1):
             u, v = negCycle[i], negCycle[i + 1]
             assert u in self.residualGraph and v in self.residualGraph[u]  # cycle generated from res G, should be true
@@ -156,7 +346,7 @@ class FlowNetwork:
         """Gets the minimum capacity among all edges on a valid (non-null) augmenting path, augPath."""
         assert augPath is not None
         # Need to identify largest difference between any capacity and flow already being pushed through
-        additionalFlow = float('inf')
+        additionalFlow = INT_INF
         for i in range(len(augPath) - 1):
             u, v = augPath[i], augPath[i + 1]
             # Need this check if sending flow to "counter" existing flow
@@ -167,7 +357,7 @@ class FlowNetwork:
                 additionalFlow = min(additionalFlow, self.getCapacity(u, v) - self.flowGraph[u].get(v, 0))
         return additionalFlow
 
-    def pushAugmentingFlow(self, augPath: list, costsPresent: bool):
+    def pushAugmentingFlow(self, augPath: list, costsPresent: bool, additionalFlow: int = None):
         """
         Pushes augmenting flow along the specified path, and updates the residuals in the residual graph
             Note: also updates the cost graph's costs (which correspond to residual costs)
@@ -175,95 +365,266 @@ class FlowNetwork:
             Note: can also be a cycle reachable from the sink node if using cycle cancelling.
         @param costsPresent: True if cost graph represents the costs of edges in residual graph,
             o/w False if Flow Network not initialized with costs in mind.
+        @param additionalFlow: the bottleneck flow to push, if the caller already knows it (eg computed during
+            the augmenting path BFS itself); recomputed from the path here if None
         @return: null
         """
         if costsPresent:
             assert self.costGraph.edges  # Must have a valid cost graph for costsPresent to be flipped to True
             # The augmenting path here is assumed to be a cycle that is passed in
             assert augPath[-1] == augPath[0]
-            additionalFlow = self.getMinCapAlongResCycle(augPath)
-        else:
+            if additionalFlow is None:
+                additionalFlow = self.getMinCapAlongResCycle(augPath)
+        elif additionalFlow is None:
             additionalFlow = self.getMinCapAlongAugPath(augPath)
+        if __debug__:  # Single pass of rep checking up front, rather than asserts inside the update loop
+            self._verifyPath(augPath, additionalFlow, costsPresent)
+        # Hoist the four edge mappings into locals once; each is consulted several times per path edge below
+        fg = self.flowGraph.edges
+        rg = self.residualGraph.edges
+        cg = self.costGraph.edges
+        cost = self.cost
+        costsActive = bool(cg)
         # If an augmenting path is specified, then just need to make the necessary changes along the augmenting path
         for i in range(len(augPath) - 1):
             u, v = augPath[i], augPath[i+1]
+            rgU = rg[u]
 
             # In the case of cycles, we want to redirect the flow for cycle cancelling, which could mean subtracting
             # Note: ok if a flow value is 0 rather than deleted from mappings - no bfs or bellman ford on flow edges
-            if v in self.flowGraph and u in self.flowGraph[v]:
-                self.flowGraph[v][u] -= additionalFlow
+            fgV = fg.get(v)
+            if fgV is not None and u in fgV:
+                fgV[u] -= additionalFlow
             else:
                 # Augment flow graph for f(u,v) normally: add additional flow, or add edge to mapping if needed
-                if u in self.flowGraph:
-                    self.flowGraph[u][v] = self.flowGraph[u].get(v, 0) + additionalFlow
+                fgU = fg.get(u)
+                if fgU is not None:
+                    fgU[v] = fgU.get(v, 0) + additionalFlow
 
             # Augment residual graph, potentially edit edges (u,v) and (v,u) if already flow going through
-            assert additionalFlow <= self.residualGraph[u][v]
             # Subtract off flow pushed through, ie delta f(u,v)
-            if v in self.residualGraph[u] and self.residualGraph[u][v] == additionalFlow:
-                del self.residualGraph[u][v]
+            if v in rgU and rgU[v] == additionalFlow:
+                del rgU[v]
                 # Augment cost graph, should emulate residual graph's edges but instead of capacities, have costs
-                if self.costGraph.edges:
-                    assert v in self.costGraph[u]
+                if costsActive:
                     # Only want to delete cost graph edge if flow reaches capacity and res G also no longer has the edge
-                    del self.costGraph[u][v]
+                    del cg[u][v]
             else:
-                self.residualGraph[u][v] -= additionalFlow
+                rgU[v] -= additionalFlow
 
             # Residual flow, from v->u
-            if v not in self.residualGraph:
-                self.residualGraph[v] = {u: additionalFlow}
+            rgV = rg.get(v)
+            if rgV is None:
+                rg[v] = {u: additionalFlow}
                 # Augment cost graph to reflect addition of new edge in residual graph
-                if self.costGraph.edges:
-                    assert v not in self.costGraph
-                    assert u in self.costGraph
+                if costsActive:
                     # pulling from the original costs mapping since that is immutable, as opposed to the mutable cost G
-                    self.costGraph[v] = {u: -self.cost[u][v]}
+                    cg[v] = {u: -cost[u][v]}
             else:
-                self.residualGraph[v][u] = self.residualGraph[v].get(u, 0) + additionalFlow
-                if self.costGraph.edges:
-                    assert v in self.costGraph
+                rgV[u] = rgV.get(u, 0) + additionalFlow
+                if costsActive:
                     # If cycle edge part of original cost func mapping, then G_c[v][u] <- -cost(v,u)
                     # O/w edge is not on a cycle and needs the -cost(u, v)
-                    if v in self.cost and u in self.cost[v]:
-                        self.costGraph[v][u] = self.cost[v][u]
+                    costV = cost.get(v)
+                    if costV is not None and u in costV:
+                        cg[v][u] = costV[u]
                     else:
-                        self.costGraph[v][u] = -self.cost[u][v]
+                        cg[v][u] = -cost[u][v]
+
+    def _vertexIds(self) -> tuple:
+        """
+        Builds (and caches) the dense Vertex -> int id mapping consulted at the API boundary of the
+        SoA/CSR lowering. Rebuilt lazily after addEdge introduces new vertices.
+        @return: tuple (vid, verts) where vid maps Vertex -> int id and verts is the inverse list
+        """
+        if self._vid is None:
+            self._verts = list(self.capacityGraph.vertices)
+            self._vid = {u: i for i, u in enumerate(self._verts)}
+        return self._vid, self._verts
+
+    def _toCSR(self) -> tuple:
+        """
+        Lowers the network into flat parallel arrays (CSR adjacency) so the max flow hot loops can run on
+        integer indices instead of hashing Vertex objects through four dicts per edge visit.
+        Every capacity edge gets two consecutive-cursor slots: a forward slot holding its residual capacity
+        and a paired reverse slot (origCap 0) holding the flow already pushed through it.
+        When the network has no cost function, an anti-parallel pair of capacity edges {(u,v), (v,u)}
+        shares a single slot pair (each slot carrying its own origCap) instead of two, halving the slot
+        count for those edges. Cost networks keep separate pairs, because the reverse ("undo") cost of
+        (u,v) is -cost(u,v), which need not equal cost(v,u).
+        The arrays that only depend on the topology/capacities/costs (everything but cap) are cached on
+        the network between calls, so repeat solves on the same topology - the common case in scheduling
+        runs - skip the degree counting and slot filling and only refresh cap from the current flow.
+        @return: tuple (vid, verts, indptr, to, cap, origCap, rev, cost) where vid maps Vertex -> dense int
+            id, verts is the inverse mapping, indptr/to are the CSR adjacency arrays, cap holds residual
+            capacities, origCap the original capacities (0 marks a reverse slot), rev[e] is the index of
+            e's paired slot, and cost the per-slot edge cost (negated on reverse slots, 0 if no cost func).
+        """
+        vid, verts = self._vertexIds()
+        n = len(verts)
+        capEdges = self.capacityGraph.edges
+        flowEdges = self.flowGraph.edges
+
+        if self._csr is not None:
+            # Topology unchanged since the last lowering: only cap depends on the current flow
+            indptr, to, cap, origCap, rev, cost, edgeSlots = self._csr
+            for u, v, e, eRev, antiParallel in edgeSlots:
+                f = flowEdges.get(u, {}).get(v, 0)
+                if antiParallel:
+                    fBack = flowEdges.get(v, {}).get(u, 0)
+                    cap[e] = origCap[e] - f + fBack
+                    cap[eRev] = origCap[eRev] - fBack + f
+                else:
+                    cap[e] = origCap[e] - f
+                    cap[eRev] = f
+            return vid, verts, indptr, to, cap, origCap, rev, cost
+
+        mergeAntiParallel = not self.cost
+        deg = array('q', [0]) * n
+        for u in capEdges:
+            ui = vid[u]
+            for v in capEdges[u]:
+                vi = vid[v]
+                if mergeAntiParallel and vi < ui and v in capEdges and u in capEdges[v]:
+                    continue  # shares the slot pair emitted while visiting the (v, u) edge
+                deg[ui] += 1
+                deg[vi] += 1  # paired reverse slot lives with v's out-edges
+        indptr = array('q', [0] * (n + 1))
+        for i in range(n):
+            indptr[i + 1] = indptr[i] + deg[i]
+
+        m = indptr[n]
+        to = array('q', [0] * m)
+        cap = array('q', [0] * m)
+        origCap = array('q', [0] * m)
+        rev = array('q', [0] * m)
+        cost = array('q', [0] * m)
+        cursor = indptr[:n]  # typed copy; advanced per vertex while filling slots
+        edgeSlots = []  # (u, v, e, eRev, antiParallel) per emitted pair, for the cap-only refresh above
+        for u in capEdges:
+            ui = vid[u]
+            fu = flowEdges.get(u, {})
+            cu = self.cost.get(u, {})
+            for v, c in capEdges[u].items():
+                vi = vid[v]
+                antiParallel = mergeAntiParallel and v in capEdges and u in capEdges[v]
+                if antiParallel and vi < ui:
+                    continue  # already emitted as the reverse slot of the (v, u) edge
+                f = fu.get(v, 0)  # respect any flow already pushed through the network
+                w = cu.get(v, 0)
+                e = cursor[ui]
+                cursor[ui] += 1
+                eRev = cursor[vi]
+                cursor[vi] += 1
+                if antiParallel:
+                    # The reverse slot is itself a capacity edge; each slot's residual includes the
+                    # opposing flow, and origCap > 0 on both marks the pair for write-back
+                    cBack = capEdges[v][u]
+                    fBack = flowEdges.get(v, {}).get(u, 0)
+                    to[e], cap[e], origCap[e], rev[e], cost[e] = vi, c - f + fBack, c, eRev, 0
+                    to[eRev], cap[eRev], origCap[eRev], rev[eRev], cost[eRev] = ui, cBack - fBack + f, cBack, e, 0
+                else:
+                    to[e], cap[e], origCap[e], rev[e], cost[e] = vi, c - f, c, eRev, w
+                    to[eRev], cap[eRev], origCap[eRev], rev[eRev], cost[eRev] = ui, f, 0, e, -w
+                edgeSlots.append((u, v, e, eRev, antiParallel))
+        self._csr = (indptr, to, cap, origCap, rev, cost, edgeSlots)
+        return vid, verts, indptr, to, cap, origCap, rev, cost
+
+    def finalize(self) -> tuple:
+        """
+        Eagerly lowers the network into its cached CSR arrays (see _toCSR), so callers that build a large
+        network up front - eg generateMidnightsFlowNetwork - can pay the one-time degree counting and slot
+        filling cost at construction time rather than inside the first solve. Safe to skip: any solver
+        lowers lazily on first use. Mirrors Graph.finalize.
+        @return: the (vid, verts, indptr, to, cap, origCap, rev, cost) tuple documented on _toCSR, for
+            read-only consumers (eg assignment extraction) that want index arithmetic over dict walks.
+            cap always reflects the current flow; a slot carries flow iff origCap > 0 and cap < origCap.
+        """
+        return self._toCSR()
+
+    def _writeCSRFlowsBack(self, verts, indptr, to, cap, origCap, rev):
+        """
+        Writes the flow results from the CSR arrays back into the dict-of-dict graphs, so that the
+        external API (flowGraph/residualGraph/costGraph + checkRep) observes the same rep as before.
+        """
+        flowEdges = self.flowGraph.edges
+        residual = {}
+        for ui in range(len(verts)):
+            u = verts[ui]
+            for e in range(indptr[ui], indptr[ui + 1]):
+                c = cap[e]
+                if c > 0:  # every slot's cap is a residual capacity, merged or not
+                    v = verts[to[e]]
+                    uRes = residual.setdefault(u, {})
+                    uRes[v] = uRes.get(v, 0) + c
+                if origCap[e] > 0:
+                    v = verts[to[e]]
+                    # On a merged anti-parallel slot origCap - cap is the net flow, which goes negative
+                    # when the opposing direction carried more; the flow graph records the max(net, 0) side
+                    f = origCap[e] - c
+                    if f < 0:
+                        f = 0
+                    if u in flowEdges:
+                        flowEdges[u][v] = f
+                    else:
+                        flowEdges[u] = {v: f}
+        self.residualGraph.edges = residual
+
+        if self.cost:  # Mirror the residual edges with their (possibly negated) costs
+            costEdges = {}
+            for x in residual:
+                for y in residual[x]:
+                    if x in self.cost and y in self.cost[x]:
+                        costEdges.setdefault(x, {})[y] = self.cost[x][y]
+                    else:
+                        costEdges.setdefault(x, {})[y] = -self.cost[y][x]
+            self.costGraph.edges = costEdges
 
     def getMaxFlow(self) -> int:
         """
-        Finds the max flow (as an integer), given the current flow network. Uses the Ford Fulkerson algorithm.
+        Finds the max flow (as an integer), given the current flow network. Uses Dinic's algorithm over a
+        flat CSR view of the residual graph: each BFS builds a level graph once, then a blocking flow is
+        pushed within it (current-arc DFS), so the number of BFS passes is O(V) rather than one per
+        augmenting path as in Edmonds-Karp, for O(V^2 E) overall. Results are written back into the dict
+        graphs afterwards, so flowGraph/residualGraph/costGraph still reflect the final flow.
         Note: Pushes flow through the network (mutates the network's flow)
         If no augmenting path exists at all, then the max flow is just 0.
         @return: any feasible max flow as an integer
-
-        Pseudocode (from https://www.hackerearth.com/practice/algorithms/graphs/maximum-flow/tutorial/):
-        function: FordFulkerson(Graph G,Node S,Node T):
-            Initialise flow in all edges to 0
-            while (there exists an augmenting path(P) between S and T in residual network graph):
-                Augment flow between S to T along the path P
-                Update residual network graph
-            return
         """
-        augmentingPath = self.getAugmentingPath()
-        while augmentingPath is not None:
-            self.pushAugmentingFlow(augmentingPath, costsPresent=False)
-            augmentingPath = self.getAugmentingPath()
-
-        maxFlow = 0
-        if self.source in self.flowGraph:
-            for v in self.flowGraph[self.source]:
-                maxFlow += self.flowGraph[self.source][v]
-        return maxFlow
+        vid, verts, indptr, to, cap, origCap, rev, _ = self._toCSR()
+        if self.source not in vid or self.sink not in vid:
+            return 0
+        s, t = vid[self.source], vid[self.sink]
+        n = len(verts)
+
+        # Preallocate the per-phase arrays once and reset them with C-speed slice copies between phases,
+        # instead of building fresh lists on every BFS/blocking-flow pass. The BFS visited set is fused
+        # into the level array (level[v] < 0 == unvisited), and levels are bounded by V, so 'i' (32-bit)
+        # elements halve its footprint vs the 'q' edge arrays - denser in cache for the scan-heavy BFS
+        level = array('i', [-1]) * n
+        levelReset = array('i', [-1]) * n
+        it = indptr[:n]  # Current-arc pointer per vertex
+        itReset = indptr[:n]
+        while True:
+            level[:] = levelReset
+            _bfsLevels_csr(indptr, to, cap, s, level)
+            if level[t] < 0:
+                break  # Sink unreachable in the residual graph -> current flow is maximum
+            it[:] = itReset
+            _blockingFlow_csr(indptr, to, cap, rev, level, it, s, t, INT_INF)
+
+        self._writeCSRFlowsBack(verts, indptr, to, cap, origCap, rev)
+        # Max flow == total flow leaving the source (edges into the source are unsupported, per addEdge)
+        return sum(origCap[e] - cap[e] for e in range(indptr[s], indptr[s + 1]) if origCap[e] > 0)
 
     def getNegCostResidualCycle(self) -> list:
         """
-        Detects if there exists a negative cost cycle in the Residual Graph, and if so, returns the cycle, o/w None.
-        Uses Bellman-Ford, since Dijkstra etc. cannot handle negative cost cycles.
+        Detects if there exists a negative cost cycle anywhere in the Residual Graph, and if so, returns the
+        cycle, o/w None. Uses SPFA (queue-based Bellman-Ford) seeded from every vertex at distance 0 - the
+        virtual super-source trick - so cycles not reachable from the sink are detected in the same pass.
         @return: list of vertices in negative cost cycle from residual graph, or null if no cycle exists
         """
-        cycle, d, p = self.costGraph.bellmanFord_SSSP(self.sink)
-        return cycle
+        return self.costGraph.findNegativeCycle()
 
     def getMinCostMaxFlow(self) -> tuple:
         """
@@ -282,24 +643,112 @@ class FlowNetwork:
                 Gc = CostNetwork(G,Gf)
             mincost = sum of Cij*Fij for each of the flow in residual graph
             return mincost
+
+        The whole algorithm runs on the CSR edge table: one record per edge holding (cap, origCap, cost,
+        rev), with the residual derived from cap, so an augmentation touches two array slots instead of
+        entries in four separate hash tables. Results are written back into the dict graphs once at the end.
         """
-        self.getMaxFlow()  # Obtains a feasible max flow and updates the Flow and Residual graphs
-        negCostCycle = self.getNegCostResidualCycle()
-        while negCostCycle is not None:
-            self.pushAugmentingFlow(negCostCycle, costsPresent=True)
-            negCostCycle = self.getNegCostResidualCycle()
-
-        # By now, there are no more negative cost cycles in the residual graph, and so our flow cost must be optimal
-        minCost, maxFlow = 0, 0
-        for u in self.flowGraph.edges:
-            for v in self.flowGraph.edges[u]:
-                if self.flowGraph.getWeight(u, v) == 0:
-                    continue
-                assert u in self.cost and v in self.cost[u]
-                minCost += self.flowGraph.getWeight(u, v) * self.cost[u][v]
-                if u == self.source:
-                    maxFlow += self.flowGraph.getWeight(u, v)
+        vid, verts, indptr, to, cap, origCap, rev, cost = self._toCSR()
+        if self.source not in vid or self.sink not in vid:
+            return 0, 0
+        s, t = vid[self.source], vid[self.sink]
+        n = len(verts)
+
+        # Feasible max flow first: same Dinic phase loop as getMaxFlow, on the same arrays
+        level = array('i', [-1]) * n
+        levelReset = array('i', [-1]) * n
+        it = indptr[:n]
+        itReset = indptr[:n]
+        while True:
+            level[:] = levelReset
+            _bfsLevels_csr(indptr, to, cap, s, level)
+            if level[t] < 0:
+                break
+            it[:] = itReset
+            _blockingFlow_csr(indptr, to, cap, rev, level, it, s, t, INT_INF)
+
+        # Cancel negative cost cycles in the residual until none remain; each cancellation redirects the
+        # cycle's bottleneck worth of flow at equal total flow but strictly smaller cost
+        while True:
+            cycle = _negCycleSPFA_csr(indptr, to, cap, rev, cost)
+            if cycle is None:
+                break
+            f = min(cap[e] for e in cycle)
+            for e in cycle:
+                cap[e] -= f
+                cap[rev[e]] += f
+
+        self._writeCSRFlowsBack(verts, indptr, to, cap, origCap, rev)
+        # By now, there are no more negative cost cycles in the residual graph, and so our flow cost must be optimal.
+        # The max flow is just the outflow over the source's own slot range, so it doesn't need the full edge scan
+        minCost = sum((origCap[e] - cap[e]) * cost[e] for e in range(len(to)) if origCap[e] > cap[e])
+        maxFlow = sum(origCap[e] - cap[e] for e in range(indptr[s], indptr[s + 1]) if origCap[e] > 0)
+        return minCost, maxFlow
 
+    def getMinCostMaxFlow_SSP(self) -> tuple:
+        """
+        Finds the min cost max flow using Successive Shortest Paths with Johnson potentials. One Bellman-Ford
+        pass over the CSR arrays initializes the potentials h, after which each augmentation runs Dijkstra on
+        the reduced costs cost(u,v) + h[u] - h[v] (always non-negative), giving O(F * E log V) overall rather
+        than the pseudo-polynomial bound of the cycle cancelling variant in getMinCostMaxFlow.
+        Note: mutates the current Flow Network state, same as getMinCostMaxFlow (results are written back
+        into the dict graphs), and assumes the cost function is defined for all capacity edges.
+        @return: tuple( minimum cost from an optimal max flow as an integer, max flow as an integer )
+        """
+        vid, verts, indptr, to, cap, origCap, rev, cost = self._toCSR()
+        if self.source not in vid or self.sink not in vid:
+            return 0, 0
+        s, t = vid[self.source], vid[self.sink]
+        n = len(verts)
+
+        # One Bellman-Ford pass (with early exit) to initialize potentials over the current residual edges
+        h = _bellmanFord_csr(indptr, to, cap, cost, s, INT_INF)
+
+        # Preallocated across augmentations; dist is reset with a C-speed slice copy per round
+        prevEdge = array('q', [-1]) * n
+        dist = array('q', [INT_INF]) * n
+        distReset = array('q', [INT_INF]) * n
+        while True:
+            # Dijkstra on reduced costs; lazy-deletion heap of (reduced dist, vertex id)
+            dist[:] = distReset
+            dist[s] = 0
+            pq = [(0, s)]
+            while pq:
+                d, u = heapq.heappop(pq)
+                if d > dist[u]:
+                    continue
+                for e in range(indptr[u], indptr[u + 1]):
+                    if cap[e] > 0:
+                        v = to[e]
+                        nd = d + cost[e] + h[u] - h[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            prevEdge[v] = e
+                            heapq.heappush(pq, (nd, v))
+            if dist[t] == INT_INF:
+                break  # Sink unreachable in the residual graph -> flow is maximum (and min cost)
+            for v in range(n):
+                if dist[v] < INT_INF:
+                    h[v] += dist[v]
+
+            # Bottleneck along the shortest path, then augment
+            f = INT_INF
+            v = t
+            while v != s:
+                e = prevEdge[v]
+                if cap[e] < f:
+                    f = cap[e]
+                v = to[rev[e]]
+            v = t
+            while v != s:
+                e = prevEdge[v]
+                cap[e] -= f
+                cap[rev[e]] += f
+                v = to[rev[e]]
+
+        self._writeCSRFlowsBack(verts, indptr, to, cap, origCap, rev)
+        minCost = sum((origCap[e] - cap[e]) * cost[e] for e in range(len(to)) if origCap[e] > cap[e])
+        maxFlow = sum(origCap[e] - cap[e] for e in range(indptr[s], indptr[s + 1]) if origCap[e] > 0)
         return minCost, maxFlow
 
     def serializeToJSON(self, outPath: str):
@@ -315,17 +764,24 @@ class FlowNetwork:
             "cost": {str: {str: int, ...}, ...}
             "residualCost": {str: {str: int, ...}, ...}
         """
-        with open(outPath, "w") as out:
-            result = {}
-            result["source"] = self.source.val
-            result["sink"] = self.sink.val
-            result["vertices"] = [v.val for v in self.capacityGraph.vertices]
-            result["capacities"] = self.capacityGraph.serialize()
-            result["cost"] = {k.val: {v.val: self.cost[k][v] for v in self.cost[k]} for k in self.cost}
-            result["flow"] = self.flowGraph.serialize()
-            result["residual"] = self.residualGraph.serialize()
-            result["residualCost"] = self.costGraph.serialize()
-            json.dump(result, out)
+        result = {}
+        result["source"] = self.source.serialize()
+        result["sink"] = self.sink.serialize()
+        result["vertices"] = [v.serialize() for v in self.capacityGraph.vertices]
+        result["capacities"] = self.capacityGraph.serialize()
+        # Serialize via Vertex.serialize (not raw .val) so non-string vals, eg the tuple-valued
+        # day/midnight vertices built by midnights.py, still produce legal JSON object keys
+        result["cost"] = {k.serialize(): {v.serialize(): w for v, w in nbrs.items()} for k, nbrs in self.cost.items()}
+        result["flow"] = self.flowGraph.serialize()
+        result["residual"] = self.residualGraph.serialize()
+        result["residualCost"] = self.costGraph.serialize()
+        if orjson is not None:
+            # orjson encodes straight to bytes, skipping the intermediate string build of json.dump
+            with open(outPath, "wb") as out:
+                out.write(orjson.dumps(result))
+        else:
+            with open(outPath, "w") as out:
+                json.dump(result, out)
 
     @staticmethod
     def deserialize(inPath: str):
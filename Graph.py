@@ -1,7 +1,110 @@
-import heapq
+from array import array
+from collections import deque
+
+_EMPTY = {}  # Shared empty adjacency returned by getChildren for vertices with no out-edges
+
+class IndexedDHeap:
+    """
+    4-ary min-heap of int ids keyed by an external priority, with a pos index per id so decreaseKey can
+    sift an entry up in place. Holding at most one entry per id keeps Dijkstra's queue at O(V) entries,
+    where the lazy-deletion pattern (push duplicates, skip stale pops) lets it grow to O(E). The 4-ary
+    layout (children of slot i at 4i+1..4i+4) also halves the tree depth vs heapq's binary heap, so
+    each sift touches fewer levels - a net win when the heap traffic dominates, as it does in Dijkstra.
+    """
+    def __init__(self, n):
+        self._heap = []  # ids, in heap order
+        self._keys = [0] * n  # Current key per id; only meaningful while the id is on the heap
+        self._pos = array('q', [-1]) * n  # Slot of each id in _heap, -1 if absent
+
+    def __len__(self):
+        return len(self._heap)
+
+    def decreaseKey(self, v, key):
+        """Inserts id v with the given key, or lowers v's existing key, restoring heap order."""
+        heap, keys, pos = self._heap, self._keys, self._pos
+        keys[v] = key
+        i = pos[v]
+        if i < 0:  # Not on the heap yet: sift up from a fresh slot at the bottom
+            i = len(heap)
+            heap.append(v)
+        while i > 0:
+            parent = (i - 1) >> 2
+            pv = heap[parent]
+            if keys[pv] <= key:
+                break
+            heap[i] = pv
+            pos[pv] = i
+            i = parent
+        heap[i] = v
+        pos[v] = i
+
+    def popMin(self):
+        """Pops the id with the minimum key off the heap. @return: tuple (key, id)"""
+        heap, keys, pos = self._heap, self._keys, self._pos
+        top = heap[0]
+        pos[top] = -1
+        last = heap.pop()
+        size = len(heap)
+        if size == 0:
+            return keys[top], top
+        lastKey = keys[last]
+        i = 0
+        while True:
+            child = (i << 2) + 1
+            if child >= size:
+                break
+            end = child + 4
+            if end > size:
+                end = size
+            best = child
+            bestKey = keys[heap[child]]
+            for c in range(child + 1, end):
+                ck = keys[heap[c]]
+                if ck < bestKey:
+                    best, bestKey = c, ck
+            if bestKey >= lastKey:
+                break
+            bv = heap[best]
+            heap[i] = bv
+            pos[bv] = i
+            i = best
+        heap[i] = last
+        pos[last] = i
+        return keys[top], top
+
+def _dijkstra_csr(indptr, indices, weights, s, n):
+    """
+    Dijkstra kernel over the CSR arrays from Graph.finalize: indexed 4-ary heap with decreaseKey, so
+    the queue holds at most one entry per vertex and no stale-entry guard is needed on pop. Relaxes
+    each popped vertex's contiguous out-slice. Module-level and touching only flat arrays and ints,
+    matching the kernel style of the FlowNetwork solvers (and ready to hand to a JIT compiler
+    wholesale if one is ever added as a dependency).
+    @return: tuple (dist, pred) - per-id shortest distances (inf where unreachable) and predecessor ids
+        (-1 where none)
+    """
+    dist = [float('inf')] * n
+    dist[s] = 0
+    pred = [-1] * n
+    pq = IndexedDHeap(n)
+    pq.decreaseKey(s, 0)
+    while len(pq):
+        curr_d, u = pq.popMin()
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            nd = curr_d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                pq.decreaseKey(v, nd)
+    return dist, pred
 
 class Vertex:
     # Assume that a Vertex is immutable
+    # Slots: thousands of these get allocated per network build (one per boi/day/midnight combination),
+    # and all they ever hold is val - dropping the per-instance __dict__ roughly halves their footprint
+    # and makes .val access a fixed slot read
+    __slots__ = ("val",)
+
     def __init__(self, x):
         # Must have immutable value x
         self.val = x
@@ -29,16 +132,16 @@ class Vertex:
         return isinstance(other, Vertex) and other.val == self.val
 
     def __lt__(self, other):
-        return self if self.val < other.val else other
+        return self.val < other.val
 
     def __le__(self, other):
-        return self if self.val <= other.val else other
+        return self.val <= other.val
 
     def __gt__(self, other):
-        return self if self.val > other.val else other
+        return self.val > other.val
 
     def __ge__(self, other):
-        return self if self.val >= other.val else other
+        return self.val >= other.val
 
 class Graph:
     def __init__(self, vertices=None, edges=None):
@@ -47,6 +150,11 @@ class Graph:
         self.vertices = set() if vertices is None else vertices
         # Adjacency set for all the edges - {u: {v1: w1, v2: w2, ...}, ...}
         self.edges = {} if edges is None else edges
+        # Lazily built CSR view of the adjacency (see finalize); None until built or after any mutation
+        self._csr = None
+        # Lazily built flat edge-list view (see _ensureEdgeList); cheaper than the CSR adjacency and
+        # sufficient for algorithms that only sweep edges, so neither is built until actually needed
+        self._flat = None
 
     def getVertices(self):
         return self.vertices  # Consider making deep copies to prevent aliasing/rep exposure issues
@@ -55,12 +163,11 @@ class Graph:
         return self.edges
 
     def getChildren(self, u):
-        assert isinstance(u, Vertex) and u in self.vertices
-        # Can instead yield from a generator for better performance, since there could be a lot of children
-        if u in self.edges:
-            return (v for v in self.edges[u].keys())
-        else:
-            return ()
+        if __debug__:  # Stripped under python -O; fires on every traversal step otherwise
+            assert isinstance(u, Vertex) and u in self.vertices
+        # Dicts iterate over their keys, so the neighbor dict itself serves as the children iterable
+        # without allocating a generator (and a frame) per call
+        return self.edges.get(u, _EMPTY)
 
     def __getitem__(self, item):
         return self.edges.get(item, {})
@@ -69,6 +176,7 @@ class Graph:
         assert isinstance(key, Vertex)
         assert isinstance(value, dict) and all(isinstance(v, Vertex) for v in value)
         self.edges[key] = value
+        self._csr = self._flat = None
 
     def getWeight(self, u, v):
         # Given vertices u and v, get the weight of the edge (u, v)
@@ -90,95 +198,258 @@ class Graph:
             v = Vertex(v)
         # Adds edge (u, v) with weight w to the Graph
         # Undefined behavior if we call addEdge(u, v, w) if there is already edge (u,v)
-        if u in self.edges.keys():
-            self.edges[u][v] = w
-        else:
-            self.edges[u] = {v: w}
+        self.edges.setdefault(u, {})[v] = w
 
-        # Add new vertices if an edge connects ones not already in the graph
-        self.vertices = self.vertices.union({u, v})
+        # Add new vertices if an edge connects ones not already in the graph; set.add is O(1) amortized,
+        # where rebuilding the set with union() was O(|V|) per edge (O(V*E) across graph construction)
+        self.vertices.add(u)
+        self.vertices.add(v)
+        self._csr = self._flat = None
 
     def addVertex(self, x):
         self.vertices.add(Vertex(x))
+        self._csr = self._flat = None
+
+    def _ensureEdgeList(self):
+        """
+        Builds (and caches) the flat edge-list view: parallel src/dst id arrays plus a weights list, with
+        the same dense ids as finalize but without sorting edges into adjacency order or building indptr.
+        Algorithms that only sweep every edge (eg Bellman-Ford) need nothing more, so graphs that never
+        run an adjacency-based traversal skip the CSR build entirely.
+        @return: tuple (vid, verts, src, dst, weights)
+        """
+        if self._flat is not None and self._flat[5] is not self.edges:
+            self._flat = None  # Same wholesale-reassignment guard as finalize
+        if self._flat is None:
+            verts = list(self.vertices)
+            vid = {u: i for i, u in enumerate(verts)}
+            src = array('q')
+            dst = array('q')
+            weights = []
+            for u, nbrs in self.edges.items():
+                ui = vid[u]
+                for v, w in nbrs.items():
+                    src.append(ui)
+                    dst.append(vid[v])
+                    weights.append(w)
+            self._flat = (vid, verts, src, dst, weights, self.edges)
+        return self._flat[:5]
+
+    def finalize(self):
+        """
+        Builds (and caches) a CSR view of the adjacency: each vertex gets a dense int id, and the
+        out-edges of vertex i live in indices/weights[indptr[i]:indptr[i+1]]. The shortest path
+        algorithms iterate these contiguous slices with int ids instead of hashing Vertex objects
+        through the dict-of-dicts per relaxation. addEdge/addVertex stay builder-only and invalidate
+        the cached view; calling finalize again after mutations rebuilds it.
+        @return: tuple (vid, verts, indptr, indices, weights) where vid maps Vertex -> int id, verts is
+            the inverse list, indptr/indices are the CSR adjacency arrays ('q') and weights is a flat
+            list of each edge's weight (a plain list, so callers' int/float weight types are preserved)
+        """
+        if self._csr is not None and self._csr[5] is not self.edges:
+            self._csr = None  # edges dict was reassigned wholesale (eg by FlowNetwork write-backs)
+        if self._csr is None:
+            verts = list(self.vertices)
+            vid = {u: i for i, u in enumerate(verts)}
+            n = len(verts)
+            deg = [0] * n
+            for u in self.edges:
+                deg[vid[u]] = len(self.edges[u])
+            indptr = array('q', [0] * (n + 1))
+            for i in range(n):
+                indptr[i + 1] = indptr[i] + deg[i]
+            indices = array('q', [0]) * indptr[n]
+            weights = [0] * indptr[n]
+            cursor = indptr[:n]
+            for u, nbrs in self.edges.items():
+                ui = vid[u]
+                e = cursor[ui]
+                for v, w in nbrs.items():
+                    indices[e] = vid[v]
+                    weights[e] = w
+                    e += 1
+                cursor[ui] = e
+            # The edges dict itself rides along so a wholesale reassignment of .edges is detected above
+            self._csr = (vid, verts, indptr, indices, weights, self.edges)
+        return self._csr[:5]
 
     def serialize(self) -> dict:
         """Serializes the graph into a Python dictionary, with each vertex also serialized.
         Format: {str: {str: int, ...}, ...}
         """
-        result = {}
-        for u in self.edges:
-            uStr = u.serialize()
-            for v in self.edges[u]:
-                vStr = v.serialize()
-                if uStr not in result:
-                    result[uStr] = {vStr: self.edges[u][v]}
-                else:
-                    result[uStr][vStr] = self.edges[u][v]
-        return result
+        # One dict-comp per source vertex: u is serialized once (not per neighbor) and the per-edge
+        # membership branch goes away
+        return {u.serialize(): {v.serialize(): w for v, w in nbrs.items()}
+                for u, nbrs in self.edges.items()}
 
     @staticmethod
     def deserialize(data):
+        # Builds the adjacency rows directly rather than via addEdge per edge; also fixes the old
+        # data[u] lookup, which indexed the string-keyed input with a Vertex (KeyError), and preserves
+        # the serialized edge weights instead of dropping them
         G = Graph()
-        for ustr in data:
+        for ustr, nbrs in data.items():
             u = Vertex.deserialize(ustr)
-            for vstr in data[u]:
-                v = Vertex.deserialize(vstr)
-                G.addEdge(u, v)
+            row = {Vertex.deserialize(vstr): w for vstr, w in nbrs.items()}
+            G.edges[u] = row
+            G.vertices.add(u)
+            G.vertices.update(row)
         return G
 
+    def reorderRCM(self):
+        """
+        Reassigns the dense ids of the cached CSR view using Reverse Cuthill-McKee ordering: BFS from a
+        minimum-degree vertex, visiting neighbors in increasing degree order, with the final order
+        reversed. Neighboring vertices end up with nearby ids, so traversals touch the dist/pred arrays
+        in tighter, cache-friendlier strides. Purely a relabeling of the internal view - the Vertex-keyed
+        API is unaffected - and worth calling once before a batch of traversals on the same graph.
+        """
+        vid, verts, indptr, indices, weights = self.finalize()
+        n = len(verts)
+        m = len(indices)
+
+        # Degrees and in-neighbors over the undirected skeleton (RCM is defined on symmetric adjacency)
+        nbrs = [set() for _ in range(n)]
+        for u in range(n):
+            for e in range(indptr[u], indptr[u + 1]):
+                nbrs[u].add(indices[e])
+                nbrs[indices[e]].add(u)
+        deg = [len(s) for s in nbrs]
+
+        order = []
+        seen = [False] * n
+        for root in sorted(range(n), key=deg.__getitem__):
+            if seen[root]:
+                continue
+            seen[root] = True
+            queue = deque([root])
+            while queue:
+                u = queue.popleft()
+                order.append(u)
+                for v in sorted(nbrs[u], key=deg.__getitem__):
+                    if not seen[v]:
+                        seen[v] = True
+                        queue.append(v)
+        order.reverse()
+
+        # Permute the cached view in one pass; subsequent finalize() calls hand out the new ids
+        newId = [0] * n
+        for newI, old in enumerate(order):
+            newId[old] = newI
+        newVerts = [verts[old] for old in order]
+        newVid = {u: i for i, u in enumerate(newVerts)}
+        newIndptr = array('q', [0] * (n + 1))
+        for newI, old in enumerate(order):
+            newIndptr[newI + 1] = newIndptr[newI] + (indptr[old + 1] - indptr[old])
+        newIndices = array('q', [0]) * m
+        newWeights = [0] * m
+        pos = 0
+        for old in order:
+            for e in range(indptr[old], indptr[old + 1]):
+                newIndices[pos] = newId[indices[e]]
+                newWeights[pos] = weights[e]
+                pos += 1
+        self._csr = (newVid, newVerts, newIndptr, newIndices, newWeights, self.edges)
+
     def bfs(self, start, target):
         # Given a graph/adjacency matrix/adjacency set, (in 6.006 ex create dict of paths to all V) find SP to target
-        queue, visited, parents = [start], {start}, {start: start}
+        # Runs on dense int ids from the CSR view - the parent array doubles as the visited set - and
+        # translates back to Vertex objects only when building the returned path
+        vid, verts, indptr, indices, _ = self.finalize()
+        n = len(verts)
+        s = vid[start]
+        t = vid.get(target, -1)
+        pred = array('q', [-1]) * n
+        pred[s] = s
+        # deque gives O(1) popleft; a list's pop(0) shifts every element and turns the queue alone into O(V^2)
+        queue = deque([s])
         while queue:  # While there are still items in the queue (FIFO)
             # Pop off first node in the current queue; once nodes in curr lvl set popped, next lvl set will be formed
-            node = queue.pop(0)
-            if node == target:  # Short circuit if found the target node
+            node = queue.popleft()
+            if node == t:  # Short circuit if found the target node
                 break
 
-            # Push all neighbors for the next level set onto queue, add to seen, add parent pointers etc
+            # Push all neighbors for the next level set onto queue, marking them visited via their parent
+            for e in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[e]
+                if pred[neighbor] < 0:  # Make sure to not visit any already visited nodes
+                    pred[neighbor] = node
+                    queue.append(neighbor)
+
+        if t < 0 or pred[t] < 0:  # No path exists/target doesn't have a parent node
+            return None
+        # Invariant at this point is that start, target were both reached, and so \exists a path start~~>target
+        # Now, construct path from start to target; appendleft builds it in order without the [::-1] copy
+        i, path = t, deque([verts[t]])
+        while i != s:  # Potentially O(V) loop here
+            i = pred[i]
+            path.appendleft(verts[i])
+
+        return list(path)
+
+    def bfsWithBottleneck(self, start, target):
+        """
+        BFS for a shortest-length path from start to target that also tracks the minimum edge weight seen
+        along the discovered path to each vertex. Saves callers (eg augmenting path searches on a residual
+        graph, where weights are residual capacities) from walking the returned path a second time.
+        @return: tuple (path, bottleneck) where bottleneck = min edge weight along path; (None, None) if no path
+        """
+        queue, visited, parents = deque([start]), {start}, {start: start}
+        minCap = {start: float('inf')}
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                break
             for neighbor in self.getChildren(node):
-                if neighbor not in visited:  # Make sure to not visit any already visited nodes
+                if neighbor not in visited:
                     parents[neighbor] = node
+                    minCap[neighbor] = min(minCap[node], self.edges[node][neighbor])
                     queue.append(neighbor)
                     visited.add(neighbor)
 
-        if target not in parents:  # No path exists/target doesn't have a parent node
-            return None
-        # Invariant at this point is that start, target \in parents set, and so \exists a path from start~~>target
-        # Now, construct path from start to target
-        i, path = target, [target]
-        while i != start:  # Potentially O(V) loop here
+        if target not in parents:
+            return None, None
+        i, path = target, deque([target])
+        while i != start:
             i = parents[i]
-            path.append(i)
+            path.appendleft(i)
 
-        return path[::-1]  # Reverse path so that it is from start to target
+        return list(path), minCap[target]
 
     def dfs(self, start, target):
         # Given graph/adjacency matrix/adjacency set, return *a* path from start to target, using depth-first search
-        stack, visited, parents = [start], {start}, {start: start}
+        # Same int-id scheme as bfs: raw ids on the traversal, Vertex translation only at the boundary
+        vid, verts, indptr, indices, _ = self.finalize()
+        n = len(verts)
+        s = vid[start]
+        t = vid.get(target, -1)
+        pred = array('q', [-1]) * n
+        pred[s] = s
+        stack = [s]
 
         # Difference between BFS and DFS is queue vs stack -> popping off from front vs back for next node to be processed
         while stack:  # While items still on stack
             curr_node = stack.pop()  # Use last element of stack as current (ie LIFO policy)
-            visited.add(curr_node)
-            if curr_node == target: break  # If found the target node, short circuit
-            # Loop through all neighbors of current node, add them to stack if not visit
-            for next_node in self.getChildren(curr_node):
-                if next_node not in visited:
-                    parents[next_node] = curr_node
+            if curr_node == t: break  # If found the target node, short circuit
+            # Loop through all neighbors of current node, add them to stack if not visited
+            for e in range(indptr[curr_node], indptr[curr_node + 1]):
+                next_node = indices[e]
+                if pred[next_node] < 0:
+                    pred[next_node] = curr_node
                     stack.append(next_node)
 
-        if target not in parents:
+        if t < 0 or pred[t] < 0:
             return None
-        # Now found the target node, want to construct path from start to target
-        i, path = target, [target]
-        while i != start:  # Potentially O(V) loop here
-            i = parents[i]
-            path.append(i)
+        # Now found the target node, want to construct path from start to target; appendleft builds it
+        # in order without the [::-1] copy
+        i, path = t, deque([verts[t]])
+        while i != s:  # Potentially O(V) loop here
+            i = pred[i]
+            path.appendleft(verts[i])
 
-        return path[::-1]  # Reverse path so that it is from start to target
+        return list(path)
 
-    def relax(self, u, v, d, p=None, pq=None, curr_d=None):
+    def relax(self, u, v, d, p=None):
         """
         If current "shortest" distance from s to v is greater than shortest distance from s to u + w(u,v), then set
         the new shortest distance from s to v to be = newly found shortest distance d(s,u) + w(u,v).
@@ -193,73 +464,76 @@ class Graph:
                 |  /
                 | /
                 u
-        Additional params pq and curr_d used by Dijkstra's to update the vertex heap
         p used by both Dijkstra's and Bellman Ford, etc to find shortest path by following predecessors to source
+        (the shortest path algorithms themselves run on the CSR view and keep their queues internally)
         @param u first input vertex
         @param v second input vertex
         @param d current shortest path distances mapping
         @param p predecessor mapping, default to None
-        @param pq priority queue of vertices ordered by key=distance
-        @param curr_d current distance away from source
         """
         assert u in d and v in d and u in self.edges and v in self.edges[u]
         if d[v] > d[u] + self.edges[u][v]:
             d[v] = d[u] + self.edges[u][v]
             if p is not None:
                 p[v] = u
-            if pq is not None:
-                assert curr_d is not None
-                heapq.heappush(pq, (curr_d + self.edges[u][v], v))
 
     def verifyDAG(self, s):
         """
         In order for the SSSP by topological sort to work, ensure that this graph is a directed acyclic graph (DAG),
-        for the nodes reachable by s
+        for the nodes reachable by s. Iterative DFS with WHITE/GRAY/BLACK coloring - a back edge to a GRAY
+        vertex betrays a cycle - so deep graphs can't overflow the interpreter stack, and callers get a
+        clean bool instead of an AssertionError (which -O would have stripped entirely).
         @param s specifying source node s to make traversal start easier
+        @return: True if the subgraph reachable from s is acyclic, False o/w
         """
-        # Find presence of a back edge, if none, then the nodes reachable from s + edges traversed form a DAG
-        curr_nodes = set()
-
-        def traverse(root):
-            curr_nodes.add(root)
-            for child in self.getChildren(root):
-                if child in curr_nodes:
-                    assert False
-                traverse(child)
-            curr_nodes.remove(root)  # Important, to keep nodes in the stack updated
-
-        return traverse(s)
-
-    def dijkstra_SSSP(self, source):
+        vid, verts, indptr, indices, _ = self.finalize()
+        color = array('b', [0]) * len(verts)  # 0 = unvisited, 1 = on the current DFS path, 2 = done
+        root = vid[s]
+        color[root] = 1
+        stack = [(root, indptr[root])]  # (vertex, next out-slot to try)
+        while stack:
+            u, e = stack[-1]
+            if e == indptr[u + 1]:  # Out-edges exhausted: u's subtree is cycle-free
+                color[u] = 2
+                stack.pop()
+                continue
+            stack[-1] = (u, e + 1)
+            v = indices[e]
+            if color[v] == 1:  # Back edge to a vertex still on the DFS path
+                return False
+            if color[v] == 0:
+                color[v] = 1
+                stack.append((v, indptr[v]))
+        return True
+
+    def dijkstra_SSSP(self, source, verify=False):
         """
         Dijkstra's algorithm for single-source shortest paths, given a start and target Vertex.
-        Note: graph must not contain any cycles with negative weights (for now, just restrict the graph to be a DAG)
+        Note: graph must not contain any cycles with negative weights - Dijkstra itself is fine with
+        (non-negatively weighted) cycles, so the DAG precondition check is opt-in rather than an O(V+E)
+        tax on every call.
         Since this implementation uses heaps, our runtime complexity of Dijkstra's Algorithm is:
         O(|E| * T(decrease_key()) + |V| * T(extract_min()))
         -> O((|E| + |V|) log |V|)
-            since the heappush for decrease key and heappop's readjusting after extracting min are both O(log |V|). 
+            since the heappush for decrease key and heappop's readjusting after extracting min are both O(log |V|).
         @param source: source node
+        @param verify: if True, first assert that the subgraph reachable from source is a DAG
         @return: 1. mapping of the shortest distances between source and every vertex (default d(s, s) <- 0)
                  2. mapping of every node to its parent in its corresponding shortest path (see: subpaths of SP's
                  are themselves SPs, and triangle inequality for why this works)
         """
-        self.verifyDAG(source)
-        d = {}
-        for v in self.vertices:
-            d[v] = float('inf')
-        d[source] = 0
-        visited = set()
-        priority_queue = [(0, source)]
+        if verify:
+            assert self.verifyDAG(source), "graph reachable from %r contains a cycle" % source
+        vid, verts, indptr, indices, weights = self.finalize()
+        n = len(verts)
+        dist, pred = _dijkstra_csr(indptr, indices, weights, vid[source], n)
+
+        # Translate back to the Vertex-keyed mappings the callers consume
+        d = {verts[i]: dist[i] for i in range(n)}
         parentMap = {source: source}
-
-        while priority_queue:
-            curr_d, u = heapq.heappop(priority_queue)
-            if curr_d > d[u]:
-                continue
-            visited.add(u)
-            for v in self.getChildren(u):
-                self.relax(u, v, d, parentMap, priority_queue, curr_d)
-
+        for i in range(n):
+            if pred[i] >= 0:
+                parentMap[verts[i]] = verts[pred[i]]
         return d, parentMap
 
     def bellmanFord_SSSP(self, source):
@@ -281,22 +555,108 @@ class Graph:
                  2. Mapping of the shortest distances between source and every vertex. None if negative cycle exists.
                  3. Mapping of predecessors, None if negative cycle exists
         """
-        d, p = {}, {}  # Initialize sp distances mapping and predecessor mapping
-        for v in self.vertices:
-            d[v] = float('inf')
+        # Flat edge-list form of the relaxation: each pass is one sweep over parallel (src, dst, w)
+        # arrays, the tropical-semiring view of Bellman-Ford, with an early exit once a pass makes no
+        # update (common well before the worst-case |V| passes). Only the edge-list view is needed,
+        # so the CSR adjacency is never built for graphs that only run Bellman-Ford
+        vid, verts, src, indices, weights = self._ensureEdgeList()
+        n = len(verts)
+        m = len(indices)
+        dist = [float('inf')] * n
+        dist[vid[source]] = 0
+        pred = [-1] * n
+
+        inf = float('inf')
+        lastRelaxed = -1
+        for _ in range(n):
+            updated = False
+            for e in range(m):
+                du = dist[src[e]]
+                if du != inf and du + weights[e] < dist[indices[e]]:
+                    dist[indices[e]] = du + weights[e]
+                    pred[indices[e]] = src[e]
+                    lastRelaxed = indices[e]
+                    updated = True
+            if not updated:
+                break
+
+        p = {verts[i]: verts[pred[i]] for i in range(n) if pred[i] >= 0}
+        if updated:
+            # All |V| passes made updates -> a negative cycle is reachable from source. A vertex relaxed
+            # in the last pass has a predecessor chain of >= |V| edges, so walking it |V| steps is
+            # guaranteed to land on the cycle itself (an arbitrary still-relaxable vertex is not: its
+            # chain may run back to the pred-less source without ever entering the cycle)
+            x = lastRelaxed
+            for _ in range(n):
+                x = pred[x]
+            return self.getCycle(verts[x], p), None, None
+
+        d = {verts[i]: dist[i] for i in range(n)}
+        return None, d, p
+
+    def bellmanFord_SSSP_SPFA(self, source):
+        """
+        SPFA (Shortest Path Faster Algorithm) variant of Bellman-Ford. Instead of unconditionally relaxing
+        every edge |V| times, only vertices whose distance actually improved are queued for re-relaxation
+        (FIFO queue + in-queue set), which is typically far cheaper on sparse graphs while retaining
+        negative cycle detection: a vertex enqueued more than |V| times must be reachable from a negative
+        cycle, and following predecessors |V| steps from it is guaranteed to land on the cycle itself.
+        @param source: input source node
+        @return: same contract as bellmanFord_SSSP:
+                 1. A negative cycle if it exists, as a list of vertices. None o/w
+                 2. Mapping of the shortest distances between source and every vertex. None if negative cycle exists.
+                 3. Mapping of predecessors, None if negative cycle exists
+        """
+        d = {v: float('inf') for v in self.vertices}
         d[source] = 0
+        p = {}
+        cycle = self._spfa(d, p, deque([source]), {source})
+        if cycle is not None:
+            return cycle, None, None
+        return None, d, p
 
-        for _ in self.vertices:
-            for u in self.edges:
-                for v in self.edges[u]:
-                    self.relax(u, v, d, p)
+    def findNegativeCycle(self):
+        """
+        Detects a negative weight cycle anywhere in the graph, not just among vertices reachable from some
+        particular source. Equivalent to adding a virtual super-source with a 0-weight edge to every vertex
+        and running Bellman-Ford from it: every vertex simply starts at distance 0 and is enqueued once,
+        so a single SPFA pass covers the whole graph.
+        @return: list of vertices in a negative cycle (first == last), or None if no negative cycle exists
+        """
+        d = dict.fromkeys(self.vertices, 0)
+        return self._spfa(d, {}, deque(self.vertices), set(self.vertices))
 
-        for u in self.edges:
-            for v in self.edges[u]:
-                if d[v] > d[u] + self.getWeight(u, v):
-                    return self.getCycle(v, p), None, None
+    def _spfa(self, d, p, queue, inQueue):
+        """
+        Shared SPFA relaxation loop: pops vertices off the FIFO queue and re-relaxes their out-edges,
+        enqueueing improved neighbors not already queued. Mutates d (distances), p (predecessors), queue
+        and inQueue in place.
+        @return: a negative cycle as a list of vertices if one is detected (a vertex enqueued more than
+            |V| times; predecessors are walked |V| steps first to guarantee landing on it), else None
+        """
+        nV = len(self.vertices)
+        count = dict.fromkeys(self.vertices, 0)  # Number of times each vertex has been enqueued
 
-        return None, d, p
+        while queue:
+            u = queue.popleft()
+            inQueue.discard(u)
+            if u not in self.edges:
+                continue
+            du = d[u]
+            for v, w in self.edges[u].items():
+                if du + w < d[v]:
+                    d[v] = du + w
+                    p[v] = u
+                    if v not in inQueue:
+                        count[v] += 1
+                        if count[v] > nV:
+                            for _ in range(nV):  # Walk back |V| steps to guarantee landing on the cycle
+                                v = p[v]
+                            return self.getCycle(v, p)
+                        queue.append(v)
+                        inQueue.add(v)
+
+        return None
 
     def getCycle(self, v, p):
         """
@@ -307,22 +667,21 @@ class Graph:
         @param p: predecessor mapping
         @return: list of vertices in the cycle
         """
-        seen, cycle = set(), []
+        pos, cycle = {}, []  # pos doubles as the seen-set and records where each vertex landed in the walk
         nextNode = v
         # No infinite loop if there isn't a cycle, since p[source] = source, just garbage return value
-        while nextNode not in seen:
-            seen.add(nextNode)
+        while nextNode not in pos:
+            pos[nextNode] = len(cycle)
             cycle.append(nextNode)
             nextNode = p[nextNode]
         lastNode = nextNode
-        cycle.append(lastNode)  # Have the repeat just to emphasize that it is a cycle
 
-        # If reached the original v, then the following does nothing. o/w we delete all vertices needed to reach a
-        # vertex in the cycle by identifying the index where the first cycle vertex occurred in our predecessor walk
-        firstOccurIdx = cycle.index(lastNode)  # Gets the index of the first occurrence of the lastNode Vertex
-        del cycle[:firstOccurIdx]  # Removes all vertices used to reach cycle, ie up to but not including firstOccurIdx
+        # If reached the original v, then the following does nothing. o/w we drop all vertices needed to
+        # reach the cycle; pos gives the first occurrence of lastNode in O(1) instead of a linear .index scan
+        cycle = cycle[pos[lastNode]:]
+        cycle.append(lastNode)  # Have the repeat just to emphasize that it is a cycle
 
-        return list(reversed(cycle))  # Reversed since we followed predecessors backwards to identify cycle
+        return cycle[::-1]  # Reversed since we followed predecessors backwards to identify cycle
 
     def printSSSPs(self, source, desiredVertices=None):
         """
@@ -333,17 +692,18 @@ class Graph:
         if desiredVertices is None:
             desiredVertices = self.getVertices()
         assert all(isinstance(v, Vertex) for v in desiredVertices)
+        self.reorderRCM()  # Tighten the id layout once before the traversal batch
         d, p = self.dijkstra_SSSP(source)
         # _, d, p = self.bellmanFord_SSSP(source)
         for v in desiredVertices:
             if v not in p or v not in desiredVertices:
                 continue
-            i, path = v, [v]
+            i, path = v, deque([v])
             while i != source:  # Potentially O(V) loop here
                 i = p[i]
-                path.append(i)
+                path.appendleft(i)
 
-            print("SSSP from source %r to node %r has distance %r and path %r" % (source, v, d[v], path[::-1]))
+            print("SSSP from source %r to node %r has distance %r and path %r" % (source, v, d[v], list(path)))
 
 
 if __name__ == "__main__":
@@ -24,13 +24,12 @@ TASK_RANGES = ["%s!B2:B12" % WEEK, "%s!B14:B23" % WEEK, "%s!B25:B33" % WEEK, "%s
 ASSIGN_DAYS_RANGES = ["%s!D2:D12" % WEEK, "%s!D14:D23" % WEEK, "%s!D25:D33" % WEEK, "%s!D35:D44" % WEEK, "%s!D46:D54" % WEEK, "%s!D56:D62" % WEEK]
 
 day_order = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Saturday"]
+DAY_TO_IDX = {d: i for i, d in enumerate(day_order)}  # O(1) range lookups instead of day_order.index scans
 
 def flatten_nested_list(L):
-    """Flattens a list of the format [ [str], [str], ... ]"""
-    result = []
-    for i in L:
-        result.append(i[0])
-    return result
+    """Flattens a list of the format [ [str], [str], ... ], skipping empty rows
+    (the Sheets API returns [] for blank cells in a fetched range)"""
+    return [row[0] for row in L if row]
 
 def convert_assignments_format(assignments: dict) -> dict:
     """Converts assignments from format of {day: {boi: midnight, ...}, ...}
@@ -56,7 +55,10 @@ def populate_assignments_and_points(inPath: str, bros: list):
         pts = info["pointsGained"]
         assignments = convert_assignments_format(info["dayAssignments"])  # Converted to {day: {m: boi, ...}, ...}
 
-        currPts = flatten_nested_list(read_vals(MASTER_SHEET_ID, POINTS_RANGE))
+        # One batchGet covers the points column, the day column and every task range, instead of a
+        # separate authenticated round-trip per read; all writes are then coalesced into one batchUpdate
+        batch = read_vals_batch(MASTER_SHEET_ID, [POINTS_RANGE, MASTER_WEEK_DAY_RANGE] + TASK_RANGES)
+        currPts = flatten_nested_list(batch[0])
         assert len(bros) == len(currPts)
         pointsArr = []
         for i, bro in enumerate(bros):  # Add each bro's point gain in same order as they appeared in bros
@@ -66,26 +68,35 @@ def populate_assignments_and_points(inPath: str, bros: list):
                 # add points to prev total, if the bro gained points this week
                 # also technically adding a "row of elements" so need a list wrapper here
                 pointsArr.append([pts[bro] + float(currPts[i])])
-        write_vals(MASTER_SHEET_ID, POINTS_RANGE, pointsArr)
+        data = [{"range": POINTS_RANGE, "values": pointsArr}]
 
-        day_idx = 0
-        days_col = read_vals(MASTER_SHEET_ID, MASTER_WEEK_DAY_RANGE)
+        days_col = batch[1]
         for entry in days_col:
             if not entry:
                 continue
             day = entry[0]
-            if day in day_order:
-                dayAssignments = []
-                task_range = TASK_RANGES[day_order.index(day)]
-                dayMidnights = flatten_nested_list(read_vals(MASTER_SHEET_ID, task_range))  # List of day's midnights
-                for m in dayMidnights:
-                    if m not in assignments[day]:
-                        continue
-                    dayAssignments.append([assignments[day][m]])
-                write_vals(MASTER_SHEET_ID, ASSIGN_DAYS_RANGES[day_idx], dayAssignments)
-                day_idx += 1
+            idx = DAY_TO_IDX.get(day)
+            if idx is None:
+                continue
+            dayAssignments = []
+            dayMidnights = flatten_nested_list(batch[2 + idx])  # List of day's midnights
+            for m in dayMidnights:
+                if m not in assignments[day]:
+                    continue
+                dayAssignments.append([assignments[day][m]])
+            # Indexing the write range by the day itself (not a running counter, which silently
+            # diverged from the day whenever a day was missing from the sheet column)
+            data.append({"range": ASSIGN_DAYS_RANGES[idx], "values": dayAssignments})
+        write_vals_batch(MASTER_SHEET_ID, data)
+
+# Process-wide memo for get_sheets_api: the OAuth dance, token unpickling and discovery build only
+# need to happen once, not per read/write call
+_SHEET = None
 
 def get_sheets_api():
+    global _SHEET
+    if _SHEET is not None:
+        return _SHEET
     creds = None
     # The file token.pickle stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
@@ -108,7 +119,8 @@ def get_sheets_api():
     service = build('sheets', 'v4', credentials=creds)
 
     # Call the Sheets API
-    return service.spreadsheets()
+    _SHEET = service.spreadsheets()
+    return _SHEET
 
 def write_vals(sheet_id: str, sheet_range: str, values: list):
     """
@@ -124,6 +136,31 @@ def write_vals(sheet_id: str, sheet_range: str, values: list):
     print('{0} cells updated.'.format(result.get('updatedCells')))
 
 
+def write_vals_batch(sheet_id: str, data: list):
+    """
+    Writes several ranges into the spreadsheet with ID sheet_id in a single batchUpdate round-trip.
+    @param sheet_id: input sheet ID, can be found in a spreadsheet's URL between spreadsheet/d/ ... /edit
+    @param data: list of {"range": sheet_range, "values": values} entries, per the Sheets API batch format
+    """
+    sheet = get_sheets_api()
+    body = {"valueInputOption": VALUE_INPUT_OPTION, "data": data}
+    result = sheet.values().batchUpdate(spreadsheetId=sheet_id, body=body).execute()
+    print('{0} cells updated.'.format(result.get('totalUpdatedCells')))
+
+
+def read_vals_batch(sheet_id: str, sheet_ranges: list) -> list:
+    """Gets the values of several ranges from the specified Sheet in a single batchGet round-trip.
+    Handles authentication/sheets client automatically.
+    @param sheet_id: input sheet ID, can be found in a spreadsheet's URL between spreadsheet/d/ ... /edit
+    @param sheet_ranges: list of ranges to fetch
+    @return: list with one list of row values per requested range, in the same order (empty list where
+        a range held no data)
+    """
+    sheet = get_sheets_api()
+    result = sheet.values().batchGet(spreadsheetId=sheet_id, ranges=sheet_ranges).execute()
+    return [vr.get('values', []) for vr in result.get('valueRanges', [])]
+
+
 def read_vals(sheet_id: str, sheet_range: str) -> list:
     """Gets a list of elements in a given sheet_range from the specified Sheet (via sheet_id)
     Handles authentication/sheets client automatically.
@@ -8,7 +8,14 @@ Date: 12/30/19
 """
 
 from FlowNetwork import *
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain
 import json, sys
+try:
+    import orjson  # Much faster C JSON codec, parses/encodes bytes directly
+except ImportError:
+    orjson = None
 
 POINTS_REQ = 59
 PERSON_BASE_COST = 10
@@ -24,10 +31,23 @@ MIDNIGHTS_PER_DAY_LIMIT = 1
 MIDNIGHTS_PER_WEEK_LIMIT = 2
 CAN_ASSIGN_NOT_PREF_MIDNIGHTS = True
 CAN_ASSIGN_NOT_PREF_DAYS = False
+# Drop non-pref'ed arcs for midnights that at least one boi pref'ed, shrinking the network considerably.
+# Off by default: preferrers are still day/week-limited, so the pruned arcs can be needed to reach the
+# full max flow (ie some midnights may go unassigned with this on)
+PRUNE_NOT_PREF_MIDNIGHT_EDGES = False
+# Seed the network with a greedy assignment before solving, so the solver starts with most of the flow
+# already in place. Only sound with the cycle cancelling solver: the greedy flow is generally not
+# min-cost for its value, and successive shortest paths cannot recover from that state (negative
+# residual cycles break its potentials), so generateMinCostMaxFlowAssignments picks the solver based
+# on whether flow is already present. Off by default - SSP from a cold start measures faster here.
+WARM_START_GREEDY = False
 
+@lru_cache(maxsize=None)
 def weightedPersonCost(pointsProgress: float) -> int:
     """
     Gets a weighted cost of assigning a midnight to each person, determined by:
+        (memoized: progress values repeat across bois - everyone starts at 0 or common totals -
+        so the float pow is paid once per distinct value)
         PERSON_BASE_COST ** (1 + person's pointsProgress / POINTS_REQ)
     Intuition: The more midnight points someone has, the less midnights they should be assigned, and vice versa.
     @param pointsProgress: number of midnight points the person has
@@ -41,33 +61,49 @@ def getMidnightAssignments(G: FlowNetwork, people: list) -> dict:
     Assumes that max flow has already been found in G, behavior unspecified o/w.
     @param G: Input flow network, assumed to have optimal max flow values already filled in.
     @param people: input list of people (repr as name strings) available to do midnights for the week
-    @return: dict mapping each person in people to list of midnights (with day) they should do
+    @return: dict mapping each person in people to list of (day, midnight, i) tuples they should do
     """
+    # Walk the network's flat CSR arc view instead of the Vertex-keyed dict graphs: two levels of index
+    # arithmetic over int arrays, with Vertex hashing only at the boi lookup and the final val read.
+    # A slot carries flow iff origCap > 0 (true capacity arc, not a residual-only reverse slot) and
+    # cap < origCap.
+    vid, verts, indptr, to, cap, origCap, rev, cost = G.finalize()
     result = {}
     for boi in people:
-        u = Vertex(boi)
-        daysAssigned = (dayBoi for dayBoi in G.flowGraph.getChildren(u) if G.flowGraph.getWeight(u, dayBoi) > 0)
-        result[boi] = []
-        for day in daysAssigned:
-            for m in G.capacityGraph.getChildren(day):
-                if G.flowGraph.getWeight(day, m) > 0:
-                    result[boi].append(m.val)
+        ui = vid[getBoiVertex(boi)]
+        assigned = result[boi] = []
+        for e in range(indptr[ui], indptr[ui + 1]):
+            if origCap[e] > 0 and cap[e] < origCap[e]:  # boi -> dayBoi arc carrying flow
+                dayId = to[e]
+                for e2 in range(indptr[dayId], indptr[dayId + 1]):
+                    if origCap[e2] > 0 and cap[e2] < origCap[e2]:  # dayBoi -> midnight arc carrying flow
+                        assigned.append(verts[to[e2]].val)
     return result
 
+@lru_cache(maxsize=None)
 def createNewMidnightVertex(day: str, m: str, i: int) -> Vertex:
     """
-    Create a new Vertex with string val that concatenates all three pieces of information together:
+    Create a new Vertex whose val is the tuple of all three pieces of information:
         day, midnight, and midnight number
+    Tuples hash cheaper than the old "day|midnight|i" strings and never need re-parsing downstream.
+    Memoized: Vertex is immutable, so the construction loop, the greedy warm start and assignment
+    extraction all share one instance per (day, m, i) instead of re-allocating it at each mention.
     @param day: which day the midnight is assigned
     @param m: the midnight
     @param i: the midnight number, ie waitings 1 or waitings 2 would have i=1 and i=2 respectively
-    @return: Vertex with str val that has all the information concatenated in a separable fashion
+    @return: Vertex with tuple val (day, m, i)
     """
-    return Vertex("%s|%s|%r" % (day, m, i))
+    return Vertex((day, m, i))
 
+@lru_cache(maxsize=None)
 def createNewDayVertex(day: str, boi: str) -> Vertex:
-    """Create a new Vertex containing a str value that concatenates day and boi together"""
-    return Vertex("%s|%s" % (day, boi))
+    """Create a new Vertex whose val is the (day, boi) tuple (memoized, same as createNewMidnightVertex)"""
+    return Vertex((day, boi))
+
+@lru_cache(maxsize=None)
+def getBoiVertex(boi: str) -> Vertex:
+    """The shared Vertex wrapper for a boi's name (memoized, same as createNewMidnightVertex)"""
+    return Vertex(boi)
 
 # def getDayCost(preferDay: bool) -> int:
 #     """
@@ -105,15 +141,14 @@ def getPeopleMidnightsToDayAssignments(peopleTasksMap: dict) -> dict:
     Given a mapping of people to their list of midnights, return a new map that maps each day to the corresponding
     people that are in turn mapped to whichever midnights they were assigned to do for that particular day.
     """
-    result = {"Monday": {}, "Tuesday": {}, "Wednesday": {}, "Thursday": {}, "Friday": {}, "Saturday": {}, "Sunday": {}}
+    days = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+    result = {day: defaultdict(list) for day in days}
     for boi in peopleTasksMap:
         for m in peopleTasksMap[boi]:
-            day, midnight, idx = m.strip().split("|")  # Stay safe by stripping, remember that kids
-            if boi in result[day]:
-                result[day][boi].append(midnight)
-            else:
-                result[day][boi] = [midnight]
-    return result
+            day, midnight, idx = m  # Vertex vals are (day, midnight, i) tuples now, nothing to re-parse
+            result[day][boi].append(midnight)  # defaultdict: one hash lookup, no membership test branch
+    # Back to plain dicts so JSON encoders (orjson rejects dict subclasses) see vanilla mappings
+    return {day: dict(assignments) for day, assignments in result.items()}
 
 def getPeoplePointsGain(dayToAssignments: dict, pointsMap: dict) -> dict:
     """
@@ -145,15 +180,20 @@ def extractData(inPath: str) -> tuple:
     @return: tuple of dictionaries + lists from the JSON, ordered as such:
         (dayToMidnights, midnightPointValues, midnightsToNumReq, people, dayPreferences, midnightPreferences, progress)
     """
-    with open(inPath, "r") as infile:
-        info = json.load(infile)
-        dayToMidnights = info["dayToMidnights"]
-        midnightPointValues = info["midnightPointValues"]
-        midnightsToNumReq = info["midnightsToNumReq"]
-        people = info["people"]
-        dayPreferences = info["dayPreferences"]
-        midnightPreferences = info["midnightPreferences"]
-        progress = info["progress"]
+    if orjson is not None:
+        # orjson parses the raw bytes directly, skipping the text decode + pure-Python parse of json.load
+        with open(inPath, "rb") as infile:
+            info = orjson.loads(infile.read())
+    else:
+        with open(inPath, "r") as infile:
+            info = json.load(infile)
+    dayToMidnights = info["dayToMidnights"]
+    midnightPointValues = info["midnightPointValues"]
+    midnightsToNumReq = info["midnightsToNumReq"]
+    people = info["people"]
+    dayPreferences = info["dayPreferences"]
+    midnightPreferences = info["midnightPreferences"]
+    progress = info["progress"]
     return dayToMidnights, midnightPointValues, midnightsToNumReq, people, dayPreferences, midnightPreferences, progress
 
 def generateMidnightsFlowNetwork(dayToMidnights: dict,
@@ -183,28 +223,63 @@ def generateMidnightsFlowNetwork(dayToMidnights: dict,
     v = {}  # Stores the mapping of string to Vertex wrapper (used to identify/add edges to/from bois in graph)
 
     for boi in people:
-        v[boi] = Vertex(boi)
+        v[boi] = getBoiVertex(boi)
         # Edges from source to people limited by number of midnights per week, and cost based on midnight point progress
         G.addEdge(S, v[boi], MIDNIGHTS_PER_WEEK_LIMIT, weightedPersonCost(progress[boi]))
 
+    # Hoisted out of the triply nested loop below: per-boi preference masks/counts (the `in` test against
+    # the raw preference lists is a linear scan) and the (day, boi) Vertex wrappers, built once per pair.
+    # The week's distinct midnights easily fit one int's worth of bits, so each boi's prefs pack into a
+    # single bitmask and membership is a shift + AND rather than a set probe.
+    allMidnights = {m for midnights in dayToMidnights.values() for m in midnights}
+    mId = {m: i for i, m in enumerate(allMidnights)}
+    prefMask = {boi: sum(1 << mId[m] for m in set(midnightPreferences[boi]) if m in mId)
+                for boi in people}
+    numAvail = {boi: len(midnightPreferences[boi]) for boi in people}
+    dayBoi = {(day, boi): createNewDayVertex(day, boi) for day in dayToMidnights for boi in people}
+
     for boi in people:
-        for boisDay in dayToMidnights:  # all 7 days for each boi to capture midnights/day limit
-            if CAN_ASSIGN_NOT_PREF_DAYS:
-                dayWithBoi = createNewDayVertex(boisDay, boi)
-                G.addEdge(v[boi], dayWithBoi, MIDNIGHTS_PER_DAY_LIMIT, 1)
-            else:
-                # TODO: Refactor so this isn't copy-paste
-                # Limit by day preferences, ie only days pref'ed will have an edge from the boi -> day
-                if boisDay in dayPreferences[boi]:
-                    dayWithBoi = createNewDayVertex(boisDay, boi)
-                    G.addEdge(v[boi], dayWithBoi, MIDNIGHTS_PER_DAY_LIMIT, 1)
+        if CAN_ASSIGN_NOT_PREF_DAYS:
+            boisDays = dayToMidnights  # all 7 days for each boi to capture midnights/day limit
+        else:
+            # Limit by day preferences, ie only days pref'ed will have an edge from the boi -> day.
+            # Walking the pref list itself (deduped, clipped to scheduled days) skips both the days
+            # that get no edge and the per-day linear scan of the list the old membership test paid.
+            boisDays = [d for d in dict.fromkeys(dayPreferences[boi]) if d in dayToMidnights]
+        for boisDay in boisDays:
+            G.addEdge(v[boi], dayBoi[boisDay, boi], MIDNIGHTS_PER_DAY_LIMIT, 1)
 
     # Gather midnight preference counts per midnight, so as to weight midnights that can only be done by 1 person
     # very negative, so that they are guaranteed to be assigned to them
-    midnightsPrefCountMap = {}
-    for boi in midnightPreferences:
-        for midnight in midnightPreferences[boi]:
-            midnightsPrefCountMap[midnight] = midnightsPrefCountMap.get(midnight, 0) + 1
+    # Counter's C-level counting over one chained iterator replaces the manual get(..., 0) + 1 loop
+    midnightsPrefCountMap = Counter(chain.from_iterable(midnightPreferences.values()))
+
+    # The boi -> midnight edge cost depends on neither the day nor the midnight copy number, so evaluate
+    # getCostBoiDayToMidnight once per (boi, midnight) pair here instead of once per (day, m, i, boi)
+    # iteration - the full cost table analogue of the numpy broadcast, minus the numpy dependency
+    costBoiMidnight = {
+        (boi, m): getCostBoiDayToMidnight(
+            bool(prefMask[boi] >> mId[m] & 1),
+            midnightPointValues[m],
+            progress[boi],
+            midnightsPrefCountMap.get(m, 0),
+            numAvail[boi]
+        )
+        for boi in people for m in allMidnights
+    }
+
+    # One eligibility list per midnight folds the old copy-paste CAN_ASSIGN_NOT_PREF_MIDNIGHTS branches
+    # (and the optional prune above) into a single filtered inner loop: everyone when non-pref'ed
+    # assignment is allowed, otherwise just the preferrers. Optional pruning also narrows to preferrers,
+    # but only for midnights that actually have some (others keep the everyone fallback).
+    eligibleBois = {}
+    for m in allMidnights:
+        if CAN_ASSIGN_NOT_PREF_MIDNIGHTS \
+                and not (PRUNE_NOT_PREF_MIDNIGHT_EDGES and midnightsPrefCountMap.get(m, 0) > 0):
+            eligibleBois[m] = people
+        else:
+            # Limit by midnight preferences, ie only midnights pref'ed will have edge (boiDay, midnight)
+            eligibleBois[m] = [boi for boi in people if prefMask[boi] >> mId[m] & 1]
 
     for day in dayToMidnights:
         for m in dayToMidnights[day]:
@@ -212,38 +287,98 @@ def generateMidnightsFlowNetwork(dayToMidnights: dict,
                 midnightWithDay = createNewMidnightVertex(day, m, i)
                 # Edges from midnights to sink with weight 1, cost 1
                 G.addEdge(midnightWithDay, T, 1, 1)
-                for boi in people:
-                    if CAN_ASSIGN_NOT_PREF_MIDNIGHTS:
-                        dayWithBoi = createNewDayVertex(day, boi)  # Just re-obtaining the dayboi Vertex for reference
-                        # Edge from every boi's day to every midnight pref'ed, cost depends on progress
-                        costBoiDayToMidnight = getCostBoiDayToMidnight(
-                            m in midnightPreferences[boi],
-                            midnightPointValues[m],
-                            progress[boi],
-                            midnightsPrefCountMap[m],
-                            len(midnightPreferences[boi])
-                        )
-                        G.addEdge(dayWithBoi, midnightWithDay, 1, costBoiDayToMidnight)
-                    else:
-                        # TODO: Refactor so this isn't copy-paste
-                        # Limit by midnight preferences, ie only midnights pref'ed will have edge (boiDay, midnight)
-                        if m in midnightPreferences[boi]:
-                            dayWithBoi = createNewDayVertex(day, boi)
-                            # Edge from every boi's day to every midnight pref'ed, cost depends on progress
-                            costBoiDayToMidnight = getCostBoiDayToMidnight(
-                                m in midnightPreferences[boi],
-                                midnightPointValues[m],
-                                progress[boi],
-                                midnightsPrefCountMap[m],
-                                len(midnightPreferences[boi])
-                            )
-                            G.addEdge(dayWithBoi, midnightWithDay, 1, costBoiDayToMidnight)
+                for boi in eligibleBois[m]:
+                    # Edge from every boi's day to every midnight pref'ed, cost depends on progress
+                    G.addEdge(dayBoi[day, boi], midnightWithDay, 1, costBoiMidnight[boi, m])
 
     if outPath is not None:
         G.serializeToJSON(outPath)
 
+    # Lower the finished network to its flat CSR arrays now, so the solver's hot loops start on integer
+    # indices immediately instead of paying the lowering cost inside the first augmentation
+    G.finalize()
     return G
 
+def buildAssignmentOutputs(G: FlowNetwork, people: list, pointsMap: dict) -> tuple:
+    """
+    Single-pass fusion of getMidnightAssignments + getPeopleMidnightsToDayAssignments +
+    getPeoplePointsGain: walks the flow arcs out of each boi exactly once and fills the day-keyed
+    assignment map and the per-person points totals simultaneously, instead of materializing the
+    intermediate per-person midnight lists and walking them twice more.
+    Assumes max flow has already been found in G, same as getMidnightAssignments.
+    @param G: Input flow network, assumed to have optimal max flow values already filled in
+    @param people: input list of people (repr as name strings) available to do midnights for the week
+    @param pointsMap: maps midnights to their associated point values
+    @return: tuple (dayToMidnightAssignmentsMap, peoplePointsGain), matching the output of the two
+        fused functions above
+    """
+    days = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+    dayAssignments = {day: defaultdict(list) for day in days}
+    pointsGain = {}
+    flowGraph = G.flowGraph
+    for boi in people:
+        u = getBoiVertex(boi)
+        for dayWithBoi, f in flowGraph.getChildren(u).items():
+            if f <= 0:
+                continue
+            for midnightWithDay, f2 in flowGraph.getChildren(dayWithBoi).items():
+                if f2 <= 0:
+                    continue
+                day, midnight, idx = midnightWithDay.val
+                dayAssignments[day][boi].append(midnight)
+                pointsGain[boi] = pointsGain.get(boi, 0) + pointsMap[midnight]
+    return {day: dict(assignments) for day, assignments in dayAssignments.items()}, pointsGain
+
+def seedGreedyAssignments(G: FlowNetwork,
+                          dayToMidnights: dict,
+                          midnightsToNumReq: dict,
+                          people: list,
+                          dayPreferences: dict,
+                          midnightPreferences: dict,
+                          progress: dict):
+    """
+    Seeds G with an obvious greedy midnight assignment: walks bois from least to most points (cheapest
+    first, mirroring the cost function) and saturates one S -> boi -> dayBoi -> midnight -> T path per
+    pref'ed day while residual capacity remains along the whole path. Every path pushed here is one
+    augmenting path the solver no longer has to discover; cycle cancelling afterwards redirects whatever
+    the greedy choices got wrong.
+    Note: leaves G with a feasible but generally not min-cost flow, so solve with getMinCostMaxFlow
+    (not the SSP variant) afterwards - see WARM_START_GREEDY.
+    @param G: flow network from generateMidnightsFlowNetwork, with no flow pushed yet
+    @param dayToMidnights: Days mapped to midnights needed that day
+    @param midnightsToNumReq: Midnights mapped to number of people req for each chore
+    @param people: List of all people available for midnights
+    @param dayPreferences: Midnight preferences for which days are best
+    @param midnightPreferences: Which midnights each person prefers
+    @param progress: Number of midnights points each person has
+    """
+    S, T = G.source, G.sink
+    residual = G.residualGraph
+    for boi in sorted(people, key=lambda b: progress[b]):
+        u = getBoiVertex(boi)
+        prefs = frozenset(midnightPreferences[boi])
+        days = dayToMidnights if CAN_ASSIGN_NOT_PREF_DAYS else dayPreferences[boi]
+        for day in days:
+            if residual.getChildren(S).get(u, 0) <= 0:
+                break  # weekly limit reached for this boi
+            if day not in dayToMidnights:
+                continue
+            dayWithBoi = createNewDayVertex(day, boi)
+            dayResidual = residual.getChildren(u).get(dayWithBoi, 0)
+            if dayResidual <= 0:
+                continue  # day not pref'ed (no arc) or its daily limit is already saturated
+            for m in dayToMidnights[day]:
+                if m not in prefs:
+                    continue
+                copies = (createNewMidnightVertex(day, m, i) for i in range(midnightsToNumReq[m]))
+                midnightWithDay = next(
+                    (c for c in copies
+                     if residual.getChildren(dayWithBoi).get(c, 0) > 0 and residual.getChildren(c).get(T, 0) > 0),
+                    None)
+                if midnightWithDay is not None:
+                    G.pushAugmentingFlow([S, u, dayWithBoi, midnightWithDay, T], False)
+                    break  # the boi -> dayBoi arc is saturated now, move on to the next day
+
 def generateMinCostMaxFlowAssignments(G: FlowNetwork, people: list, midnightPointValues: dict, outPath: str):
     """
     Finds the min-cost max flow given a Flow Network, G, and writes the results to a JSON file w format:
@@ -256,26 +391,49 @@ def generateMinCostMaxFlowAssignments(G: FlowNetwork, people: list, midnightPoin
     @param midnightPointValues: mapping of midnights to their corresponding point values
     @param outPath: path to output file - output file will be created/overwritten
     """
-    cost, maxFlow = G.getMinCostMaxFlow()
+    # Successive shortest paths (Bellman-Ford potentials + Dijkstra on reduced costs) beats the
+    # cycle cancelling variant on this network: unit-capacity arcs mean few augmentations, each O(E log V).
+    # It does require starting from a min-cost (eg zero) flow though, so a warm-started network (see
+    # seedGreedyAssignments) is solved with cycle cancelling, which tolerates any feasible starting flow.
+    if any(f > 0 for nbrs in G.flowGraph.edges.values() for f in nbrs.values()):
+        cost, maxFlow = G.getMinCostMaxFlow()
+    else:
+        cost, maxFlow = G.getMinCostMaxFlow_SSP()
     print("Min-cost Max Flow identified...")
-    peopleMidnightMap = getMidnightAssignments(G, people)
-    dayToMidnightAssignmentsMap = getPeopleMidnightsToDayAssignments(peopleMidnightMap)
-    peoplePointsGain = getPeoplePointsGain(dayToMidnightAssignmentsMap, midnightPointValues)
+    dayToMidnightAssignmentsMap, peoplePointsGain = buildAssignmentOutputs(G, people, midnightPointValues)
     result = {"cost": cost, "maxFlow": maxFlow, "dayAssignments": dayToMidnightAssignmentsMap,"pointsGained": peoplePointsGain}
-    with open(outPath, "w") as outfile:
-        json.dump(result, outfile)
+    if orjson is not None:
+        # orjson encodes straight to bytes, skipping the intermediate string build of json.dump
+        with open(outPath, "wb") as outfile:
+            outfile.write(orjson.dumps(result))
+    else:
+        with open(outPath, "w") as outfile:
+            json.dump(result, outfile)
 
 
-if __name__ == "__main__":
-    inpPath = sys.argv[1]  # Path of the input JSON containing prefs, points, etc.
-    outPath = sys.argv[2]  # Path of the output JSON of max flow assignments
-    flowNetworkSave = "flowboiTest.json"
+def main(inpPath: str, outPath: str, flowNetworkSave: str = "flowboiTest.json"):
+    """
+    Runs the whole pipeline: extract the week's data, build the flow network, solve for the min-cost max
+    flow assignment and write the results. Callable directly (eg parameter sweeps over the policy flags,
+    or driving several weeks from one process) rather than only through the argv glue below.
+    @param inpPath: Path of the input JSON containing prefs, points, etc.
+    @param outPath: Path of the output JSON of max flow assignments
+    @param flowNetworkSave: where to serialize the solved Flow Network itself
+    """
     dayToMidnights, midnightPointValues, midnightsToNumReq, people, dayPreferences, midnightPreferences, progress = extractData(inpPath)
     print("Data extracted from JSON...")
     G = generateMidnightsFlowNetwork(dayToMidnights, midnightPointValues, midnightsToNumReq, people, dayPreferences,
                                      midnightPreferences, progress)
     print("Flow Network generated...")
+    if WARM_START_GREEDY:
+        seedGreedyAssignments(G, dayToMidnights, midnightsToNumReq, people, dayPreferences,
+                              midnightPreferences, progress)
+        print("Greedy warm start seeded...")
     generateMinCostMaxFlowAssignments(G, people, midnightPointValues, outPath)
     print("Assignments saved to %s" % outPath)
     G.serializeToJSON(flowNetworkSave)  # Serializing after finding the min cost max flow
     print("Flow Network saved to %s" % flowNetworkSave)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], sys.argv[2])
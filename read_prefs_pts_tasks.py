@@ -1,5 +1,9 @@
 from midnight_sheets import *
 import json, sys
+try:
+    import orjson  # Much faster C JSON encoder, writes bytes directly
+except ImportError:
+    orjson = None
 
 PREFS_SHEET_ID = "16a_DVp-Tq5mhHbhUX1xUWUK0O-gOjzHPyfOYiXiaAF4"
 MIDNIGHT_PREFS_RANGE = "Form Responses 1!D2:D22"
@@ -12,9 +16,11 @@ TASK_VALUE_RANGES = ["%s!C2:C12" % WEEK, "%s!C14:C23" % WEEK, "%s!C25:C33" % WEE
 
 def add_prefs(d: dict):
     midnightPreferences, dayPreferences = {}, {}
-    names = flatten_nested_list(read_vals(PREFS_SHEET_ID, PREF_NAMES_RANGE))
-    mPrefs = flatten_nested_list(read_vals(PREFS_SHEET_ID, MIDNIGHT_PREFS_RANGE))
-    dPrefs = flatten_nested_list(read_vals(PREFS_SHEET_ID, DAY_PREFS_RANGE))
+    # One batchGet round-trip for all three columns instead of three authenticated HTTP calls
+    batch = read_vals_batch(PREFS_SHEET_ID, [PREF_NAMES_RANGE, MIDNIGHT_PREFS_RANGE, DAY_PREFS_RANGE])
+    names = flatten_nested_list(batch[0])
+    mPrefs = flatten_nested_list(batch[1])
+    dPrefs = flatten_nested_list(batch[2])
     for i, boi in enumerate(names):
         midnightPreferences[boi] = [m.strip() for m in mPrefs[i].split(",")]
         dayPreferences[boi] = [d.strip() for d in dPrefs[i].split(",")]
@@ -22,22 +28,24 @@ def add_prefs(d: dict):
     d["dayPreferences"] = dayPreferences
 
 def add_points(d: dict):
-    names = flatten_nested_list(read_vals(MASTER_SHEET_ID, MASTER_NAMES_RANGE))
-    pts = flatten_nested_list(read_vals(MASTER_SHEET_ID, POINTS_RANGE))
+    batch = read_vals_batch(MASTER_SHEET_ID, [MASTER_NAMES_RANGE, POINTS_RANGE])
+    names = flatten_nested_list(batch[0])
+    pts = flatten_nested_list(batch[1])
     d["progress"] = {n: float(p) for n, p in zip(names, pts)}
 
 def add_midnights(d: dict):
     dayToMidnights, midnightPointValues = {}, {}
-    for i, entry in enumerate(read_vals(MASTER_SHEET_ID, MASTER_WEEK_DAY_RANGE)):
+    # The day column plus every per-day task/value range in one batchGet, instead of up to
+    # 1 + 2 * len(day_order) separate round-trips
+    batch = read_vals_batch(MASTER_SHEET_ID, [MASTER_WEEK_DAY_RANGE] + TASK_RANGES + TASK_VALUE_RANGES)
+    for i, entry in enumerate(batch[0]):
         if not entry:
             continue
         day = entry[0]
-        if day in day_order:
-            day_idx = day_order.index(day)
-            task_range = TASK_RANGES[day_idx]
-            dayMidnights = flatten_nested_list(read_vals(MASTER_SHEET_ID, task_range))  # List of day's midnights
-            value_range = TASK_VALUE_RANGES[day_idx]
-            dayMidnightValues = flatten_nested_list(read_vals(MASTER_SHEET_ID, value_range))
+        if day in DAY_TO_IDX:
+            day_idx = DAY_TO_IDX[day]
+            dayMidnights = flatten_nested_list(batch[1 + day_idx])  # List of day's midnights
+            dayMidnightValues = flatten_nested_list(batch[1 + len(TASK_RANGES) + day_idx])
 
             dayAssignments = []
             assert len(dayMidnights) == len(dayMidnightValues)
@@ -66,5 +74,9 @@ if __name__ == "__main__":
         if bro not in result["dayPreferences"]:
             result["dayPreferences"][bro] = list(result["dayToMidnights"].keys())
     outPath = sys.argv[1]
-    with open(outPath, "w") as outfile:
-        json.dump(result, outfile)
+    if orjson is not None:
+        with open(outPath, "wb") as outfile:
+            outfile.write(orjson.dumps(result))
+    else:
+        with open(outPath, "w") as outfile:
+            json.dump(result, outfile)